@@ -0,0 +1,33 @@
+import time
+
+from engine.analytic import ReferenceCheck, exact_test, random_win_probabilities
+from engine.batch import BatchTester
+from engine.strategy_tester import StrategyTester
+from engine.warships import ShipConfig
+from strategies.batch_random_strategy import BatchRandomStrategy
+from strategies.random_strategy import RandomStrategy
+
+
+def main():
+    # The exact win distribution of RandomStrategy as a reference for both simulators: at every number of
+    # games the simulated curve and mean must stay within their confidence bounds of the exact ones.
+    config = ShipConfig("polish")
+    exact = random_win_probabilities(config)
+    start = time.perf_counter()
+    exact_test(random_win_probabilities, config, 10**6)
+    print("exact distribution: {:.2f} ms\n".format((time.perf_counter() - start) * 1000))
+
+    for name, test, counts in (
+            ("StrategyTester", lambda n: StrategyTester(1, config, seed=1, analytic=False).test(RandomStrategy(), n),
+             (10**3, 10**4, 10**5)),
+            ("BatchTester", lambda n: BatchTester(config, seed=1, analytic=False).test(BatchRandomStrategy, n),
+             (10**4, 10**5, 10**6))):
+        for num_of_games in counts:
+            start = time.perf_counter()
+            wins, probabilities = test(num_of_games)
+            elapsed = time.perf_counter() - start
+            print("{:<16}{:>8.2f} s  {}".format(name, elapsed, ReferenceCheck(wins, exact)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import time
+
+from engine.batch import BatchTester
+from engine.strategy_tester import StrategyTester
+from strategies.batch_human_strategy import BatchHumanStrategy
+from strategies.batch_random_strategy import BatchRandomStrategy
+from strategies.human_strategy import HumanStrategy
+from strategies.random_strategy import RandomStrategy
+
+
+def games_per_second(test, num_of_games):
+    start = time.perf_counter()
+    test(num_of_games)
+    return num_of_games / (time.perf_counter() - start)
+
+
+def main():
+    print("{:<24}{:>14}{:>14}{:>10}".format("", "Python", "Batch", "Speedup"))
+    for strategy_class, batch_strategy_class in ((RandomStrategy, BatchRandomStrategy),
+                                                 (HumanStrategy, BatchHumanStrategy)):
+        python = games_per_second(lambda n: StrategyTester(1, analytic=False).test(strategy_class(), n), 2000)
+        batch = games_per_second(lambda n: BatchTester(seed=0, analytic=False).test(batch_strategy_class, n), 20000)
+        print("{:<24}{:>14.0f}{:>14.0f}{:>9.1f}x".format(strategy_class.__name__ + " games/s", python, batch,
+                                                          batch / python))
+
+
+if __name__ == "__main__":
+    main()
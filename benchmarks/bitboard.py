@@ -0,0 +1,46 @@
+import random
+import time
+import tracemalloc
+
+from engine.bitboard import BitGrid
+from engine.warships import Grid, ShipConfig, gen_rand_grid
+from strategies.analytical_strategy import AnalyticalStrategy
+from strategies.human_strategy import HumanStrategy
+from strategies.random_strategy import RandomStrategy
+
+
+def memory_per_grid(grid_class, config, count=1000):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    grids = [gen_rand_grid(config, grid_class) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del grids
+    return used / count
+
+
+def games_per_second(grid_class, strategy_class, config, num_of_games):
+    random.seed(0)
+    start = time.perf_counter()
+    for i in range(num_of_games):
+        grid = gen_rand_grid(config, grid_class)
+        strategy = strategy_class()
+        while not grid.is_won():
+            strategy.run(grid)
+    return num_of_games / (time.perf_counter() - start)
+
+
+def main():
+    config = ShipConfig("polish")
+    print("{:<28}{:>14}{:>14}".format("", "Grid", "BitGrid"))
+    print("{:<28}{:>14.0f}{:>14.0f}".format("bytes per grid", memory_per_grid(Grid, config),
+                                            memory_per_grid(BitGrid, config)))
+    for strategy_class, num_of_games in ((RandomStrategy, 2000), (HumanStrategy, 2000), (AnalyticalStrategy, 100)):
+        print("{:<28}{:>14.0f}{:>14.0f}".format(strategy_class.__name__ + " games/s",
+                                                games_per_second(Grid, strategy_class, config, num_of_games),
+                                                games_per_second(BitGrid, strategy_class, config, num_of_games)))
+
+
+if __name__ == "__main__":
+    main()
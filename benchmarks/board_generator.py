@@ -0,0 +1,61 @@
+import random
+import time
+
+from engine.board_generator import board_generator
+from engine.warships import Grid, GridPoint, ShipConfig
+
+
+def legacy_gen_rand_grid(config: ShipConfig):
+    # gen_rand_grid before the placement tables: guess a point and a direction up to 50 times per ship.
+    grid = Grid()
+    missing = 0
+    for ship_detail in config:
+        for i in range(ship_detail.quantity):
+            for tries_count in range(50):
+                point = GridPoint(random.randint(0, 9), random.randint(0, 9))
+                try:
+                    grid.place_ship(point, random.choice(GridPoint.directions), ship_detail.length)
+                    break
+                except ValueError:
+                    pass
+            else:
+                missing += 1
+    return missing
+
+
+def dense_config():
+    config = ShipConfig()
+    for length, quantity in ((5, 1), (4, 2), (3, 3), (2, 4), (1, 4)):
+        config.add_ship_details(length, quantity)
+    return config
+
+
+def boards_per_second(generate, num_of_boards):
+    start = time.perf_counter()
+    for i in range(num_of_boards):
+        generate()
+    return num_of_boards / (time.perf_counter() - start)
+
+
+def main():
+    random.seed(0)
+    # Uniform boards need the board counts first (the "counting s" column), which are built once per process.
+    print("{:<10}{:>16}{:>16}{:>16}{:>16}{:>16}".format("", "legacy/s", "missing ships", "sequential/s",
+                                                        "counting s", "uniform/s"))
+    for name, config, num_of_boards in (("polish", ShipConfig("polish"), 2000), ("dense", dense_config(), 200)):
+        generator = board_generator(config)
+        missing = [legacy_gen_rand_grid(config) for i in range(num_of_boards)]
+        start = time.perf_counter()
+        generator.count()
+        counting = time.perf_counter() - start
+        print("{:<10}{:>16.0f}{:>15.2%}{:>16.0f}{:>16.2f}{:>16.0f}".format(
+            name,
+            boards_per_second(lambda: legacy_gen_rand_grid(config), num_of_boards),
+            sum(missing) / (num_of_boards * len(generator.lengths)),
+            boards_per_second(generator.sample, num_of_boards),
+            counting,
+            boards_per_second(generator.sample_uniform, num_of_boards)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import time
+
+from engine.executors import ProcessExecutor, SerialExecutor, ThreadExecutor
+from engine.strategy_tester import StrategyTester
+from strategies.analytical_strategy import AnalyticalStrategy
+from strategies.human_strategy import HumanStrategy
+
+GAMES = (1, 10, 100, 1000, 10000)
+
+
+def seconds_per_run(tester, strategy, num_of_games, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        tester.test(strategy, num_of_games)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    # Wall time of one StrategyTester.test call on every backend, and the smallest number of games from which
+    # each backend is faster than playing serially.
+    parser = argparse.ArgumentParser(description="Compare StrategyTester execution backends.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with SerialExecutor() as serial, ThreadExecutor(args.workers) as threads, \
+            ProcessExecutor(args.workers) as processes:
+        backends = [("serial", StrategyTester(executor=serial, seed=1)),
+                    ("threads", StrategyTester(executor=threads, seed=1)),
+                    ("new pool per run", StrategyTester(args.workers, seed=1)),
+                    ("warm process pool", StrategyTester(executor=processes, seed=1))]
+        for strategy in (HumanStrategy(), AnalyticalStrategy()):
+            games = [n for n in GAMES if n <= (10000 if isinstance(strategy, HumanStrategy) else 1000)]
+            print("\n{:<24}".format(type(strategy).__name__) + "".join("{:>12}".format(n) for n in games)
+                  + "   (ms per run, by number of games)")
+            times = {}
+            for name, tester in backends:
+                times[name] = [seconds_per_run(tester, strategy, n, args.repeat) for n in games]
+                print("{:<24}".format(name) + "".join("{:>12.1f}".format(t * 1000) for t in times[name]))
+            for name, tester in backends[1:]:
+                # The crossover: the smallest number of games from which the backend stays faster.
+                crossover = None
+                for n, t, serial_t in reversed(list(zip(games, times[name], times["serial"]))):
+                    if t >= serial_t:
+                        break
+                    crossover = n
+                print("{} beats serial from {} games".format(name, crossover) if crossover is not None else
+                      "{} doesn't beat serial here".format(name))
+
+
+if __name__ == "__main__":
+    main()
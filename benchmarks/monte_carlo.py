@@ -0,0 +1,55 @@
+import random
+import time
+
+from engine.posterior import PosteriorSampler
+from engine.stats import HistogramStats
+from engine.strategy_tester import StrategyTester
+from engine.warships import ShipConfig, board_points, gen_rand_grid
+from strategies.analytical_strategy import AnalyticalStrategy
+from strategies.human_strategy import HumanStrategy
+from strategies.monte_carlo_strategy import MonteCarloStrategy
+from strategies.random_strategy import RandomStrategy
+
+
+def sampler_speed(config, num_of_games):
+    # Shots per second of MonteCarloStrategy, Gibbs steps per second, and ship positions weighed per move
+    # (see PosteriorSampler), which measures work, not independent boards.
+    random.seed(0)
+    shots = steps = positions = 0
+    start = time.perf_counter()
+    for i in range(num_of_games):
+        grid = gen_rand_grid(config)
+        sampler = PosteriorSampler(grid.ship_config, random, MonteCarloStrategy.particles)
+        points = board_points(grid.width, grid.height)
+        while not grid.is_won():
+            sampler.sample(MonteCarloStrategy.steps_per_move)
+            cell = sampler.best_cell()
+            sampler.observe(cell, grid.check_code(points[cell]))
+            shots += 1
+        steps += sampler.steps
+        positions += sampler.weighed
+    elapsed = time.perf_counter() - start
+    return shots / elapsed, steps / elapsed, positions / shots
+
+
+def main():
+    config = ShipConfig("polish")
+    shots_per_second, steps_per_second, positions_per_move = sampler_speed(config, 20)
+    print("shots/s {:.0f}, Gibbs steps/s {:.0f}, positions weighed per move {:.0f}".format(
+        shots_per_second, steps_per_second, positions_per_move))
+
+    strategies = [AnalyticalStrategy(), RandomStrategy(), HumanStrategy(), MonteCarloStrategy()]
+    results, comparisons = StrategyTester(1, config, seed=1).compare(strategies, 500)
+    print("\n{:<22}{:>8}{:>10}{:>8}{:>8}{:>8}".format("", "mean", "+-95%", "p10", "p50", "p90"))
+    for strategy, (wins, probabilities) in zip(strategies, results):
+        stats = HistogramStats(wins)
+        print("{:<22}{:>8.2f}{:>10.2f}{:>8}{:>8}{:>8}".format(type(strategy).__name__, stats.mean(),
+                                                             stats.mean_half_width(), stats.quantile(0.1),
+                                                             stats.quantile(0.5), stats.quantile(0.9)))
+    print()
+    for comparison in comparisons:
+        print(comparison)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import random
+import time
+
+from engine.batch import BatchTester
+from engine.bitboard import BitGrid
+from engine.warships import Grid, ShipConfig, gen_rand_grid
+from strategies.analytical_strategy import AnalyticalStrategy
+from strategies.batch_human_strategy import BatchHumanStrategy
+from strategies.batch_random_strategy import BatchRandomStrategy
+from strategies.human_strategy import HumanStrategy
+from strategies.random_strategy import RandomStrategy
+
+# Fleets grow with the board: the polish fleet on 10x10, one longer ship kind and one more ship of every
+# kind for each step up.
+FLEETS = {
+    10: ((4, 1), (3, 2), (2, 3), (1, 4)),
+    15: ((5, 1), (4, 2), (3, 3), (2, 4), (1, 5)),
+    20: ((6, 1), (5, 2), (4, 3), (3, 4), (2, 5), (1, 6)),
+}
+
+
+def fleet_config(size):
+    config = ShipConfig(width=size, height=size)
+    for length, quantity in FLEETS[size]:
+        config.add_ship_details(length, quantity)
+    return config
+
+
+def seconds_per_game(strategy_class, config, grid_class, num_of_games):
+    random.seed(0)
+    grids = [gen_rand_grid(config, grid_class) for i in range(num_of_games)]
+    start = time.perf_counter()
+    for grid in grids:
+        strategy_class().run(grid)
+    return (time.perf_counter() - start) / num_of_games
+
+
+def seconds_per_batch_game(strategy_class, config, num_of_games):
+    tester = BatchTester(config, seed=0, analytic=False)
+    start = time.perf_counter()
+    tester.test(strategy_class, num_of_games)
+    return (time.perf_counter() - start) / num_of_games
+
+
+def main():
+    # The time per game divided by the number of cells stays roughly flat when a strategy scales linearly.
+    runs = [("RandomStrategy", lambda config: seconds_per_game(RandomStrategy, config, Grid, 100)),
+            ("HumanStrategy", lambda config: seconds_per_game(HumanStrategy, config, Grid, 100)),
+            ("AnalyticalStrategy", lambda config: seconds_per_game(AnalyticalStrategy, config, Grid, 100)),
+            ("Analytical/BitGrid", lambda config: seconds_per_game(AnalyticalStrategy, config, BitGrid, 100)),
+            ("BatchRandomStrategy", lambda config: seconds_per_batch_game(BatchRandomStrategy, config, 4096)),
+            ("BatchHumanStrategy", lambda config: seconds_per_batch_game(BatchHumanStrategy, config, 4096))]
+    print("{:<22}{:>8}{:>14}{:>16}".format("", "board", "games/s", "us/game/cell"))
+    for name, run in runs:
+        for size in sorted(FLEETS):
+            seconds = run(fleet_config(size))
+            print("{:<22}{:>8}{:>14.0f}{:>16.3f}".format(name, "{0}x{0}".format(size), 1 / seconds,
+                                                          seconds * 1e6 / (size * size)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from engine.batch import BatchTester
+from engine.strategy_tester import StrategyTester
+from engine.warships import Grid, GridPoint, ShipConfig, board_points, gen_rand_grid
+from strategies.analytical_strategy import AnalyticalStrategy
+from strategies.batch_human_strategy import BatchHumanStrategy
+from strategies.batch_random_strategy import BatchRandomStrategy
+from strategies.human_strategy import HumanStrategy
+from strategies.monte_carlo_strategy import MonteCarloStrategy
+from strategies.random_strategy import RandomStrategy
+
+# Every benchmark reports a rate (operations, calls or games per second), so higher is always better and a
+# regression is a rate that dropped by more than the threshold.
+VERSION = 1
+STRATEGIES = (RandomStrategy, HumanStrategy, AnalyticalStrategy, MonteCarloStrategy)
+# Strategies that play far slower than the others get this share of their games.
+GAME_SHARE = {MonteCarloStrategy: 0.05}
+BATCH_STRATEGIES = (BatchRandomStrategy, BatchHumanStrategy)
+
+
+def rate(operations, run):
+    start = time.perf_counter()
+    run()
+    return operations / (time.perf_counter() - start)
+
+
+def played_grids(config, count, moves):
+    # Boards with `moves` random cells already checked, as they look in the middle of a game.
+    grids = [gen_rand_grid(config) for i in range(count)]
+    for grid in grids:
+        for index in random.sample(range(grid.width * grid.height), moves):
+            grid.check(GridPoint(index % grid.width, index // grid.width, grid.width, grid.height))
+    return grids
+
+
+def bench_move(scale):
+    point = GridPoint(4, 4)
+    directions = GridPoint.directions * (25000 * scale)
+
+    def run():
+        for direction in directions:
+            point.move(direction)
+    return rate(len(directions), run)
+
+
+def bench_place_ship(scale):
+    grids = [Grid() for i in range(2000 * scale)]
+    start = GridPoint(2, 3)
+
+    def run():
+        for grid in grids:
+            grid.place_ship(start, "right", 4)
+    return rate(len(grids), run)
+
+
+def bench_check(config, scale):
+    grids = [gen_rand_grid(config) for i in range(100 * scale)]
+    points = [GridPoint(index % 10, index // 10) for index in range(100)]
+
+    def run():
+        for grid in grids:
+            for point in points:
+                grid.check(point)
+    return rate(len(grids) * len(points), run)
+
+
+def bench_check_code(config, scale):
+    grids = [gen_rand_grid(config) for i in range(100 * scale)]
+    points = board_points()
+
+    def run():
+        for grid in grids:
+            for point in points:
+                grid.check_code(point)
+    return rate(len(grids) * len(points), run)
+
+
+def bench_check_many(config, scale):
+    grids = [gen_rand_grid(config) for i in range(1000 * scale)]
+    orders = [random.sample(board_points(), 100) for grid in grids]
+
+    def run():
+        for grid, order in zip(grids, orders):
+            grid.check_many(order)
+    return rate(len(grids), run)
+
+
+def bench_is_won(config, scale):
+    grids = played_grids(config, 100, 50)
+    calls = 200 * scale
+
+    def run():
+        for grid in grids:
+            for i in range(calls):
+                grid.is_won()
+    return rate(len(grids) * calls, run)
+
+
+def bench_gen_rand_grid(config, scale):
+    num_of_grids = 1000 * scale
+    return rate(num_of_grids, lambda: [gen_rand_grid(config) for i in range(num_of_grids)])
+
+
+class TimedAnalyticalStrategy(AnalyticalStrategy):
+    # Times only the hunt point choice of otherwise normal games.
+
+    def init_vars(self, grid):
+        super().init_vars(grid)
+        self.calls = 0
+        self.elapsed = 0
+
+    def pick_most_probable_hunt_point(self):
+        start = time.perf_counter()
+        point = super().pick_most_probable_hunt_point()
+        self.elapsed += time.perf_counter() - start
+        self.calls += 1
+        return point
+
+
+def bench_hunt_point(config, scale):
+    calls = 0
+    elapsed = 0
+    for grid in [gen_rand_grid(config) for i in range(20 * scale)]:
+        strategy = TimedAnalyticalStrategy()
+        strategy.run(grid)
+        calls += strategy.calls
+        elapsed += strategy.elapsed
+    return calls / elapsed
+
+
+def games_for(strategy_class, num_of_games):
+    return max(1, int(num_of_games * GAME_SHARE.get(strategy_class, 1)))
+
+
+def bench_serial(strategy_class, config, scale):
+    grids = [gen_rand_grid(config) for i in range(games_for(strategy_class, 100 * scale))]
+
+    def run():
+        for grid in grids:
+            strategy_class().run(grid)
+    return rate(len(grids), run)
+
+
+def bench_batch(strategy_class, config, scale):
+    num_of_games = 4096 * scale
+    return rate(num_of_games, lambda: BatchTester(config, seed=0, analytic=False).test(strategy_class, num_of_games))
+
+
+def bench_tester(strategy_class, config, workers, scale):
+    num_of_games = games_for(strategy_class, 500 * scale * workers)
+    tester = StrategyTester(workers, config, seed=0, analytic=False)
+    return rate(num_of_games, lambda: tester.test(strategy_class(), num_of_games))
+
+
+def benchmarks(config, max_workers, scale):
+    # (name, unit, function) of every benchmark of the suite.
+    suite = [
+        ("GridPoint.move", "calls/s", lambda: bench_move(scale)),
+        ("Grid.place_ship", "calls/s", lambda: bench_place_ship(scale)),
+        ("Grid.check", "calls/s", lambda: bench_check(config, scale)),
+        ("Grid.check_code", "calls/s", lambda: bench_check_code(config, scale)),
+        ("Grid.check_many", "games/s", lambda: bench_check_many(config, scale)),
+        ("Grid.is_won", "calls/s", lambda: bench_is_won(config, scale)),
+        ("gen_rand_grid", "grids/s", lambda: bench_gen_rand_grid(config, scale)),
+        ("AnalyticalStrategy.pick_most_probable_hunt_point", "calls/s", lambda: bench_hunt_point(config, scale)),
+    ]
+    for strategy_class in STRATEGIES:
+        suite.append(("serial/" + strategy_class.__name__, "games/s",
+                      lambda strategy_class=strategy_class: bench_serial(strategy_class, config, scale)))
+    for strategy_class in BATCH_STRATEGIES:
+        suite.append(("serial/" + strategy_class.__name__, "games/s",
+                      lambda strategy_class=strategy_class: bench_batch(strategy_class, config, scale)))
+    for strategy_class in STRATEGIES:
+        for workers in range(1, max_workers + 1):
+            suite.append(("tester/{}/workers={}".format(strategy_class.__name__, workers), "games/s",
+                          lambda strategy_class=strategy_class, workers=workers:
+                          bench_tester(strategy_class, config, workers, scale)))
+    return suite
+
+
+def run_suite(config, max_workers=1, repeat=3, scale=1, only=None):
+    # Best of `repeat` runs of every benchmark, since noise only ever makes a run slower.
+    results = {}
+    for name, unit, function in benchmarks(config, max_workers, scale):
+        if only is not None and only not in name:
+            continue
+        random.seed(0)
+        results[name] = {"value": max(function() for i in range(repeat)), "unit": unit}
+        print("{:<56}{:>14.0f} {}".format(name, results[name]["value"], unit), file=sys.stderr)
+    return {
+        "version": VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+
+
+def compare(results, baseline, threshold):
+    # (name, baseline value, value, relative change) of every benchmark in both runs, and the names of those
+    # that got slower by more than the threshold.
+    rows = []
+    regressions = []
+    for name, result in results["results"].items():
+        if name not in baseline["results"]:
+            continue
+        old = baseline["results"][name]["value"]
+        change = result["value"] / old - 1
+        rows.append((name, old, result["value"], change))
+        if change < -threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the engine and strategy hot paths.")
+    parser.add_argument("--output", help="write the results as JSON to this file ('-' for stdout)")
+    parser.add_argument("--baseline", help="compare with the JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="largest allowed relative slowdown against the baseline (default 0.1)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="run StrategyTester with 1..WORKERS workers (default: number of CPUs)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scale", type=int, default=1, help="multiply the amount of work of every benchmark")
+    parser.add_argument("--only", help="run only the benchmarks whose name contains this string")
+    args = parser.parse_args()
+
+    results = run_suite(ShipConfig("polish"), args.workers, args.repeat, args.scale, args.only)
+    if args.output == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        rows, regressions = compare(results, baseline, args.threshold)
+        print("\n{:<56}{:>14}{:>14}{:>10}".format("", "baseline", "now", "change"), file=sys.stderr)
+        for name, old, new, change in rows:
+            flag = "  REGRESSION" if name in regressions else ""
+            print("{:<56}{:>14.0f}{:>14.0f}{:>+9.1%}{}".format(name, old, new, change, flag), file=sys.stderr)
+        if regressions:
+            print("\n{} benchmark(s) slower than the baseline by more than {:.0%}.".format(
+                len(regressions), args.threshold), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import argparse
+import time
+
+from engine.executors import ProcessExecutor
+from engine.sweep import Sweep, parameter_grid
+from strategies.analytical_strategy import AnalyticalStrategy
+
+GRID = {"tie_break": ["scan", "centre"], "direction_choice": ["random", "room"]}
+
+
+def main():
+    # A successive-halving sweep of AnalyticalStrategy's parameters against the exhaustive way: a full test of
+    # every variant with as many games as the sweep's winner got.
+    parser = argparse.ArgumentParser(description="Successive halving against exhaustive parameter tuning.")
+    parser.add_argument("--budget", type=int, default=4000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with ProcessExecutor(args.workers) as executor:
+        results = Sweep(seed=1, executor=executor).run(AnalyticalStrategy, GRID, args.budget)
+        print(results)
+
+        start = time.perf_counter()
+        exhaustive = []
+        for params in parameter_grid(GRID):
+            # A sweep of one variant is a plain test of it.
+            single = Sweep(seed=1, executor=executor).run(AnalyticalStrategy, {name: [value] for name, value in
+                                                                               params.items()}, results.best().games)
+            exhaustive.append((single.best().stats().mean(), str(single.best().variant)))
+        elapsed = time.perf_counter() - start
+        print("\nexhaustive: {} games, wall time {:.2f} s".format(len(exhaustive) * results.best().games, elapsed))
+        for mean, name in sorted(exhaustive):
+            print("{:<48}{:>8.2f}".format(name, mean))
+
+
+if __name__ == "__main__":
+    main()
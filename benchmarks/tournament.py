@@ -0,0 +1,33 @@
+import argparse
+import time
+
+from engine.strategy_tester import StrategyTester
+from engine.tournament import Tournament
+from engine.warships import ShipConfig
+from strategies.analytical_strategy import AnalyticalStrategy
+from strategies.human_strategy import HumanStrategy
+from strategies.random_strategy import RandomStrategy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tournament against back-to-back StrategyTester runs.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--games", type=int, default=1000)
+    args = parser.parse_args()
+
+    strategies = [RandomStrategy(), HumanStrategy(), AnalyticalStrategy()]
+    configs = [ShipConfig("polish"), ShipConfig("polish", 12, 12)]
+    start = time.perf_counter()
+    for config in configs:
+        for strategy in strategies:
+            StrategyTester(args.workers, config, seed=1).test(strategy, args.games)
+    back_to_back = time.perf_counter() - start
+
+    results = Tournament(args.workers, seed=1).run(strategies, configs, args.games)
+    print(results)
+    print("back to back {:.2f} s, tournament {:.2f} s ({:.2f}x)".format(back_to_back, results.wall_time,
+                                                                       back_to_back / results.wall_time))
+
+
+if __name__ == "__main__":
+    main()
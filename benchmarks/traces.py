@@ -0,0 +1,50 @@
+import argparse
+import os
+import tempfile
+import time
+
+from engine.executors import SerialExecutor
+from engine.strategy_tester import StrategyTester
+from engine.traces import METRICS, TraceFile
+from strategies.analytical_strategy import AnalyticalStrategy
+from strategies.human_strategy import HumanStrategy
+
+
+def best_time(function, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    # What recording traces adds to a run, how big the traces are, and how fast they replay under each metric.
+    parser = argparse.ArgumentParser(description="Cost of recording shot traces and speed of replaying them.")
+    parser.add_argument("--games", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Serial play, so that the difference isn't lost in the startup time of a process pool.
+    with tempfile.TemporaryDirectory() as directory, SerialExecutor() as executor:
+        filename = os.path.join(directory, "run.trace")
+        for strategy, num_of_games in ((HumanStrategy(), args.games), (AnalyticalStrategy(), args.games // 10)):
+            plain = StrategyTester(seed=1, executor=executor)
+            traced = StrategyTester(seed=1, executor=executor, traces=filename)
+            plain_time = best_time(lambda: plain.test(strategy, num_of_games), args.repeat)
+            traced_time = best_time(lambda: traced.test(strategy, num_of_games), args.repeat)
+            print("{:<20}{:>8} games  plain {:>8.3f} s  traced {:>8.3f} s  overhead {:>+6.1%}  {:.1f} bytes/game"
+                  .format(type(strategy).__name__, num_of_games, plain_time, traced_time,
+                          traced_time / plain_time - 1, os.path.getsize(filename) / num_of_games))
+
+        with TraceFile(filename) as traces:
+            games = sum(1 for trace in traces)
+            for name, metric in sorted(METRICS.items()):
+                seconds = best_time(lambda: [metric(trace) for trace in traces], args.repeat)
+                print("{:<20}{:>12.0f} traces/minute".format(name, games / seconds * 60))
+
+
+if __name__ == "__main__":
+    main()
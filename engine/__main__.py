@@ -0,0 +1,229 @@
+import argparse
+import json
+import math
+import sys
+import time
+
+# Command-line entry point: python -m engine run|compare|bench ... prints one JSON object. Everything but
+# argparse and json is imported once a command needs it, so that asking for help or a bad command line
+# costs no simulation modules, and one-worker runs play in this process without starting a pool.
+
+STRATEGIES = {
+    "random": "strategies.random_strategy.RandomStrategy",
+    "human": "strategies.human_strategy.HumanStrategy",
+    "analytical": "strategies.analytical_strategy.AnalyticalStrategy",
+    "monte_carlo": "strategies.monte_carlo_strategy.MonteCarloStrategy",
+}
+GRID_CLASSES = {"grid": "engine.warships.Grid", "bit": "engine.bitboard.BitGrid"}
+
+
+def strategy_path(name):
+    # A name of STRATEGIES, a class name from it (HumanStrategy) or the import path of any Strategy class.
+    if name.lower() in STRATEGIES:
+        return STRATEGIES[name.lower()]
+    for path in STRATEGIES.values():
+        if path.rsplit(".", 1)[1] == name:
+            return path
+    if "." in name:
+        return name
+    raise ValueError("Unknown strategy {}! Use one of {} or an import path.".format(name, ", ".join(STRATEGIES)))
+
+
+def load_strategy(name):
+    from engine.checkpoint import load_class
+
+    path = strategy_path(name)
+    try:
+        return load_class(path)()
+    except (ImportError, AttributeError) as error:
+        raise ValueError("Can't load strategy {}: {}".format(path, error))
+
+
+def parse_config(name, width, height):
+    # A preset of ShipConfig (polish), ship lengths and quantities as LENGTHxQUANTITY,... (4x1,3x2,2x3,1x4), or
+    # the import path of a ShipConfig or of a function returning one, which brings its own board size.
+    from engine.board_generator import board_generator
+    from engine.checkpoint import load_class
+    from engine.warships import ShipConfig
+
+    if "." in name:
+        try:
+            config = load_class(name)
+        except (ImportError, AttributeError, ValueError) as error:
+            raise ValueError("Can't load config {}: {}".format(name, error))
+        if not isinstance(config, ShipConfig):
+            config = config()
+        if not isinstance(config, ShipConfig):
+            raise ValueError("{} is not a ShipConfig!".format(name))
+    elif "x" not in name:
+        config = ShipConfig(name, width, height)
+    else:
+        config = ShipConfig(width=width, height=height)
+        for detail in name.split(","):
+            try:
+                length, quantity = detail.split("x")
+                config.add_ship_details(int(length), int(quantity))
+            except ValueError:
+                raise ValueError("Bad ship details {}! Use LENGTHxQUANTITY.".format(detail))
+    board_generator(config)  # raises ValueError if the ships don't fit
+    return config
+
+
+def make_tester(args, config, analytic=True):
+    from engine.checkpoint import load_class
+    from engine.executors import ProcessExecutor, SerialExecutor
+    from engine.strategy_tester import StrategyTester
+
+    executor = SerialExecutor() if args.workers == 1 else ProcessExecutor(args.workers, [config])
+    return StrategyTester(config=config, grid_class=load_class(GRID_CLASSES[args.grid]), seed=args.seed,
+                          corpus=args.corpus, chunk_size=args.chunk_size, analytic=analytic, executor=executor)
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError("{} is not a positive number".format(text))
+    return value
+
+
+def strict_json(value):
+    # Infinite and undefined numbers, such as the variance reduction of identical strategies, as null: JSON has
+    # no Infinity or NaN.
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: strict_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [strict_json(item) for item in value]
+    return value
+
+
+def describe_config(config):
+    from engine.checkpoint import config_to_list
+
+    return {"width": config.width, "height": config.height, "ships": config_to_list(config)}
+
+
+def describe_wins(wins, probabilities, confidence):
+    from engine.stats import HistogramStats
+
+    stats = HistogramStats(wins)
+    return {"games": stats.count, "mean": stats.mean(), "mean_half_width": stats.mean_half_width(confidence),
+            "p10": stats.quantile(0.1), "p50": stats.quantile(0.5), "p90": stats.quantile(0.9), "wins": wins,
+            "probabilities": probabilities}
+
+
+def run(args, config, strategies):
+    from engine.checkpoint import class_path
+
+    strategy = strategies[0]
+    tester = make_tester(args, config, not args.simulate)
+    exact = tester.exact_distribution(strategy) is not None
+    start = time.perf_counter()
+    try:
+        wins, probabilities = tester.test(strategy, args.num_of_games)
+    finally:
+        tester.executor.close()
+    result = {"command": "run", "strategy": class_path(type(strategy)), "config": describe_config(tester.config),
+              "seed": args.seed, "exact": exact, "seconds": time.perf_counter() - start}
+    result.update(describe_wins(wins, probabilities, args.confidence))
+    return result
+
+
+def compare(args, config, strategies):
+    from engine.checkpoint import class_path
+    from engine.stats import z_score
+
+    tester = make_tester(args, config)
+    start = time.perf_counter()
+    try:
+        results, comparisons = tester.compare(strategies, args.num_of_games)
+    finally:
+        tester.executor.close()
+    z = z_score(args.confidence)
+    return {"command": "compare", "config": describe_config(tester.config), "seed": args.seed,
+            "seconds": time.perf_counter() - start,
+            "strategies": [dict(describe_wins(wins, probabilities, args.confidence),
+                                strategy=class_path(type(strategy)))
+                           for strategy, (wins, probabilities) in zip(strategies, results)],
+            "comparisons": [{"baseline": class_path(type(strategies[0])), "challenger": class_path(type(strategy)),
+                             "mean_difference": comparison.mean(),
+                             "confidence_interval": list(comparison.confidence_interval(z)),
+                             "variance_reduction": comparison.variance_reduction()}
+                            for strategy, comparison in zip(strategies[1:], comparisons)]}
+
+
+def bench(args, config, strategies):
+    # Simulation speed of every strategy, exact results left aside.
+    from engine.checkpoint import class_path
+
+    tester = make_tester(args, config, analytic=False)
+    results = []
+    try:
+        for strategy in strategies:
+            start = time.perf_counter()
+            tester.test(strategy, args.num_of_games)
+            seconds = time.perf_counter() - start
+            results.append({"strategy": class_path(type(strategy)), "games": args.num_of_games, "seconds": seconds,
+                            "games_per_second": args.num_of_games / seconds})
+    finally:
+        tester.executor.close()
+    return {"command": "bench", "config": describe_config(tester.config), "workers": args.workers,
+            "results": results}
+
+
+def parser():
+    parser = argparse.ArgumentParser(prog="python -m engine", description="Run warships experiments; prints JSON.")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config", default="polish",
+                        help="preset name, LENGTHxQUANTITY,... or an import path (default: polish)")
+    common.add_argument("--width", type=int, default=10)
+    common.add_argument("--height", type=int, default=10)
+    common.add_argument("--grid", choices=sorted(GRID_CLASSES), default="grid")
+    common.add_argument("--seed", type=int)
+    common.add_argument("--corpus", help="corpus file of boards to play instead of random ones")
+    common.add_argument("--workers", type=positive_int, default=1, help="processes; 1 plays in this process (default)")
+    common.add_argument("--chunk-size", type=positive_int)
+    common.add_argument("--confidence", type=float, default=0.95)
+    common.add_argument("--output", help="file to write the JSON to instead of stdout")
+    commands = parser.add_subparsers(dest="command", required=True)
+    strategies_help = "{}, a class name or an import path".format(", ".join(STRATEGIES))
+
+    run_parser = commands.add_parser("run", parents=[common], help="test one strategy")
+    run_parser.add_argument("strategies", nargs=1, metavar="strategy", help=strategies_help)
+    run_parser.add_argument("num_of_games", type=positive_int)
+    run_parser.add_argument("--simulate", action="store_true", help="play games even if results can be computed")
+    run_parser.set_defaults(function=run)
+
+    compare_parser = commands.add_parser("compare", parents=[common], help="strategies on the same boards")
+    compare_parser.add_argument("num_of_games", type=positive_int)
+    compare_parser.add_argument("strategies", nargs="+", help=strategies_help + "; the first is the baseline")
+    compare_parser.set_defaults(function=compare)
+
+    bench_parser = commands.add_parser("bench", parents=[common], help="simulation speed of strategies")
+    bench_parser.add_argument("strategies", nargs="+", help=strategies_help)
+    bench_parser.add_argument("--games", dest="num_of_games", type=positive_int, default=1000)
+    bench_parser.set_defaults(function=bench)
+    return parser
+
+
+def main(argv=None):
+    command_parser = parser()
+    args = command_parser.parse_args(argv)
+    # Only a bad command line is reported as a usage error; errors of the run itself keep their traceback.
+    try:
+        config = parse_config(args.config, args.width, args.height)
+        strategies = [load_strategy(name) for name in args.strategies]
+    except ValueError as error:
+        command_parser.error(str(error))
+    result = args.function(args, config, strategies)
+    output = json.dumps(strict_json(result), allow_nan=False)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+from math import comb
+
+from engine.stats import HistogramStats, z_score
+from engine.warships import ShipConfig
+
+
+def ship_cells(config: ShipConfig):
+    return sum(ship_detail.length * ship_detail.quantity for ship_detail in config)
+
+
+def random_win_probabilities(config: ShipConfig):
+    # Firing at a uniformly random permutation of the board wins when the last of the K ship cells comes up,
+    # so a game of N cells lasts n moves with the negative hypergeometric probability C(n-1, K-1) / C(N, K),
+    # whatever the board looks like.
+    cells, ships = config.width * config.height, ship_cells(config)
+    if ships == 0:
+        return [1.0] + [0.0] * cells
+    boards = comb(cells, ships)
+    return [comb(moves - 1, ships - 1) / boards if moves >= ships else 0.0 for moves in range(cells + 1)]
+
+
+def cumulative(probabilities):
+    total = 0.0
+    curve = []
+    for probability in probabilities:
+        total += probability
+        curve.append(min(total, 1.0))
+    return curve
+
+
+def win_distribution_of(strategy_class, methods=("run",)):
+    # The win_distribution of a strategy class, or None. A subclass that overrides any of the `methods` the
+    # strategy plays with doesn't play like the class it inherits the distribution from, so it has one only
+    # if it declares it itself.
+    for owner in strategy_class.__mro__:
+        if "win_distribution" in vars(owner):
+            break
+    else:
+        return None
+    if any(getattr(strategy_class, method, None) is not getattr(owner, method, None) for method in methods):
+        return None
+    return strategy_class.win_distribution
+
+
+def exact_test(win_distribution, config: ShipConfig, num_of_games):
+    # (wins, probabilities) in the format of StrategyTester.test, computed instead of simulated. wins[x] is
+    # the expected number of the num_of_games games won in x moves, rounded to whole games so that they still
+    # add up to num_of_games (the largest remainders are rounded up).
+    probabilities = win_distribution(config)
+    expected = [num_of_games * probability for probability in probabilities]
+    wins = [int(games) for games in expected]
+    missing = max(0, num_of_games - sum(wins))
+    for moves in sorted(range(len(wins)), key=lambda moves: wins[moves] - expected[moves])[:missing]:
+        wins[moves] += 1
+    return wins, cumulative(probabilities)
+
+
+class ReferenceCheck:
+    # Compares a simulated `wins` histogram with the exact distribution: the largest distance between the
+    # two cumulative curves (Kolmogorov-Smirnov) against the DKW band of the simulation, and the simulated
+    # mean against the exact one. Both hold with the given confidence if the simulator is right.
+
+    def __init__(self, wins, exact_probabilities, confidence=0.999):
+        self.stats = HistogramStats(wins)
+        self.count = self.stats.count
+        self.confidence = confidence
+        simulated = cumulative([won / self.count for won in wins])
+        exact = cumulative(exact_probabilities)
+        self.deviation = max(abs(a - b) for a, b in zip(simulated, exact))
+        self.band = self.stats.band_half_width(confidence)
+        self.exact_mean = sum(moves * probability for moves, probability in enumerate(exact_probabilities))
+        self.exact_std_dev = (sum(moves ** 2 * probability for moves, probability in enumerate(exact_probabilities))
+                              - self.exact_mean ** 2) ** 0.5
+        self.mean_error = self.stats.mean() - self.exact_mean
+        self.mean_half_width = z_score(confidence) * self.exact_std_dev / self.count ** 0.5
+
+    def passed(self):
+        return self.deviation <= self.band and abs(self.mean_error) <= self.mean_half_width
+
+    def __str__(self):
+        return "{} games: curve off by {:.5f} (band {:.5f}), mean off by {:+.4f} (+-{:.4f}): {}".format(
+            self.count, self.deviation, self.band, self.mean_error, self.mean_half_width,
+            "ok" if self.passed() else "FAILED")
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+
+from engine.analytic import exact_test
+from engine.executors import ProcessExecutor
+from engine.strategy_tester import StrategyTester, blank_wins, play_chunk, wins_to_cumulative_probability
+from engine.warships import ShipConfig
+from strategies.strategy import Strategy
+
+
+class Snapshot:
+    # Progress of a run: `wins` and the cumulative `probabilities` of the games finished so far.
+
+    def __init__(self, games, num_of_games, wins, elapsed, probabilities=None):
+        self.games = games
+        self.num_of_games = num_of_games
+        self.wins = wins
+        self.probabilities = (probabilities if probabilities is not None
+                              else wins_to_cumulative_probability(wins, games) if games else [0.0] * len(wins))
+        self.elapsed = elapsed
+        self.finished = games >= num_of_games
+
+    def games_per_second(self):
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return "{}/{} games [{:.2%}], {:.0f} games/s".format(self.games, self.num_of_games,
+                                                             self.games / self.num_of_games,
+                                                             self.games_per_second())
+
+
+class SimulationPool:
+    # A process pool that plays the runs of any number of coroutines without blocking the event loop:
+    #
+    #     async with SimulationPool(4) as pool:
+    #         async for snapshot in pool.stream(StrategyTester(seed=1), AnalyticalStrategy(), 10**5):
+    #             print(snapshot)
+    #
+    # Every run keeps at most `workers` chunks queued in the pool and queues the next one only when one of its
+    # own finishes, so concurrent runs take turns chunk by chunk. A run that is cancelled, or whose stream is
+    # closed, stops queueing chunks; its chunks already running finish and are thrown away. The tester gives
+    # the config, seed, chunk size and so on of a run; its number of workers is ignored.
+    #
+    # The pool is a ProcessExecutor that builds the tables of `configs` (with `uniform`, the board counts too)
+    # before its workers start, on a thread, so that the event loop goes on meanwhile. Pass an `executor` to
+    # share a ProcessExecutor or ThreadExecutor with other runs instead; closing the pool leaves it open.
+
+    def __init__(self, workers=1, configs=(ShipConfig("polish"),), uniform=False, executor=None):
+        self.workers = executor.workers if executor is not None else workers
+        self.configs = list(configs)
+        self.uniform = uniform
+        self.executor = executor
+        self.own_executor = executor is None
+        self.lock = threading.Lock()
+
+    def start(self):
+        # Blocks until the workers are up; coroutines start the pool with started() instead.
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessExecutor(self.workers, self.configs, self.uniform)
+        return self
+
+    async def started(self):
+        if self.executor is None:
+            await asyncio.get_running_loop().run_in_executor(None, self.start)
+        return self
+
+    def close(self):
+        with self.lock:
+            if self.executor is not None and self.own_executor:
+                self.executor.close()
+                self.executor = None
+
+    async def __aenter__(self):
+        return await self.started()
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+        return False
+
+    def __submit(self, loop, chunk):
+        # The executor calls back from another thread, which hands the result over to the event loop.
+        future = loop.create_future()
+
+        def settle(method, value):
+            if not future.done():
+                method(value)
+
+        def done(result):
+            try:
+                loop.call_soon_threadsafe(settle, future.set_result, result)
+            except RuntimeError:  # the loop is closed, nobody is waiting any more
+                pass
+
+        def failed(error):
+            try:
+                loop.call_soon_threadsafe(settle, future.set_exception, error)
+            except RuntimeError:
+                pass
+
+        self.executor.submit(play_chunk, chunk, done, failed)
+        return future
+
+    async def stream(self, tester: StrategyTester, strategy: Strategy, num_of_games, interval=1.0):
+        # Yields a Snapshot at most every `interval` seconds while the run goes on (never with interval=None),
+        # then the final one.
+        start = time.perf_counter()
+        distribution = tester.exact_distribution(strategy)
+        if distribution is not None:
+            wins, probabilities = exact_test(distribution, tester.board_config(), num_of_games)
+            yield Snapshot(num_of_games, num_of_games, wins, time.perf_counter() - start, probabilities)
+            return
+
+        await self.started()
+        loop = asyncio.get_running_loop()
+        chunks = tester.chunks([strategy], num_of_games, tester.seed)
+        wins = blank_wins(tester.board_config())
+        games = 0
+        running = set()
+        last_snapshot = start
+        try:
+            while True:
+                while len(running) < self.workers:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    running.add(self.__submit(loop, chunk))
+                if not running:
+                    break
+                timeout = max(0.0, last_snapshot + interval - time.perf_counter()) if interval is not None else None
+                finished, running = await asyncio.wait(running, timeout=timeout,
+                                                       return_when=asyncio.FIRST_COMPLETED)
+                for future in finished:
+                    first_game, chunk_wins, chunk_differences, profile, records, traces = future.result()
+                    wins = [a + b for a, b in zip(wins, chunk_wins[0])]
+                    games += sum(chunk_wins[0])
+                now = time.perf_counter()
+                if running and interval is not None and now - last_snapshot >= interval:
+                    last_snapshot = now
+                    yield Snapshot(games, num_of_games, list(wins), now - start)
+        finally:
+            for future in running:
+                future.cancel()
+        yield Snapshot(games, num_of_games, wins, time.perf_counter() - start)
+
+    async def test(self, tester: StrategyTester, strategy: Strategy, num_of_games):
+        # Like StrategyTester.test: (wins, probabilities).
+        async for snapshot in self.stream(tester, strategy, num_of_games, interval=None):
+            pass
+        return snapshot.wins, snapshot.probabilities
@@ -0,0 +1,178 @@
+import numpy as np
+
+from engine.analytic import exact_test, win_distribution_of
+from engine.board_generator import placements_of_length
+from engine.warships import HIT, MISS, SUNK, ShipConfig
+from engine.strategy_tester import wins_to_cumulative_probability
+
+# Cells are indexed as y * width + x. NEIGHBOURS[i][d] is the cell next to i in GridPoint.directions[d]
+# (left, right, up, down), or -1 when it would fall off the board. HALO_CELLS[i] lists the 3x3 neighbourhood
+# of cell i, with the cells off the board pointing at a padding column `width * height`.
+DELTAS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+OPPOSITE = np.array([1, 0, 3, 2])
+
+_tables = {}
+
+
+def board_tables(width, height):
+    # (NEIGHBOURS, HALO_CELLS) of a width x height board, built once per size.
+    if (width, height) not in _tables:
+        cells = width * height
+        neighbours = np.full((cells, 4), -1, dtype=np.int64)
+        halo_cells = np.full((cells, 9), cells, dtype=np.int64)
+        for i in range(cells):
+            x, y = i % width, i // width
+            for d, (x_delta, y_delta) in enumerate(DELTAS):
+                if 0 <= x + x_delta < width and 0 <= y + y_delta < height:
+                    neighbours[i, d] = (y + y_delta) * width + x + x_delta
+            for k, (x_delta, y_delta) in enumerate((a, b) for a in (-1, 0, 1) for b in (-1, 0, 1)):
+                if 0 <= x + x_delta < width and 0 <= y + y_delta < height:
+                    halo_cells[i, k] = (y + y_delta) * width + x + x_delta
+        _tables[width, height] = neighbours, halo_cells
+    return _tables[width, height]
+
+
+NEIGHBOURS, HALO_CELLS = board_tables(10, 10)
+
+
+def dilate(masks, width=10, height=10):
+    # 3x3 neighbourhood of every set cell, for an (n, width * height) boolean array, as a horizontal and then
+    # a vertical pass of shifted ORs; linear in the number of cells.
+    grid = masks.reshape(-1, height, width)
+    rows = grid.copy()
+    rows[:, :, 1:] |= grid[:, :, :-1]
+    rows[:, :, :-1] |= grid[:, :, 1:]
+    dilated = rows.copy()
+    dilated[:, 1:] |= rows[:, :-1]
+    dilated[:, :-1] |= rows[:, 1:]
+    return dilated.reshape(len(masks), width * height)
+
+
+_placement_rows = {}
+
+
+def placement_rows(length, width=10, height=10):
+    # The cells of every legal ship position, one row each, and the cells of its 3x3 exclusion halo (with
+    # repeats and padding, see HALO_CELLS).
+    key = (length, width, height)
+    if key not in _placement_rows:
+        placements = placements_of_length(length, width, height)
+        cells = np.array([[(placement.y + (placement.direction == "down") * i) * width + placement.x +
+                           (placement.direction == "right") * i for i in range(length)]
+                          for placement in placements], dtype=np.int64)
+        halos = board_tables(width, height)[1][cells].reshape(len(placements), -1)
+        _placement_rows[key] = cells, halos
+    return _placement_rows[key]
+
+
+class BatchGrid:
+
+    def __init__(self, ship_ids, ship_lengths, width=10, height=10):
+        # ship_ids[g, i] is the index of the ship covering cell i of game g, or -1 for water.
+        self.width, self.height = width, height
+        self.cells = width * height
+        self.neighbours = board_tables(width, height)[0]
+        self.ship_ids = ship_ids
+        self.ships = ship_ids >= 0
+        self.checked = np.zeros_like(self.ships)
+        self.checked_cells = np.zeros(len(ship_ids), dtype=np.int64)
+        self.remaining = np.tile(np.array(ship_lengths, dtype=np.int64), (len(ship_ids), 1))
+        self.ship_cells_left = self.ships.sum(axis=1)
+        self.ship_lengths = ship_lengths
+
+    def __len__(self):
+        return len(self.ship_ids)
+
+    @property
+    def ship_tensor(self):
+        return self.ships.reshape(-1, self.height, self.width)
+
+    @property
+    def checked_tensor(self):
+        return self.checked.reshape(-1, self.height, self.width)
+
+    def check(self, cells):
+        games = np.arange(len(cells))
+        self.checked[games, cells] = True
+        self.checked_cells += 1
+        results = np.full(len(cells), MISS, dtype=np.int64)
+
+        ship = self.ship_ids[games, cells]
+        hit = ship >= 0
+        hit_games, hit_ships = games[hit], ship[hit]
+        self.remaining[hit_games, hit_ships] -= 1
+        self.ship_cells_left[hit_games] -= 1
+        results[hit_games] = np.where(self.remaining[hit_games, hit_ships] == 0, SUNK, HIT)
+        return results
+
+    def is_won(self):
+        return self.ship_cells_left == 0
+
+    def keep(self, mask):
+        self.ship_ids = self.ship_ids[mask]
+        self.ships = self.ships[mask]
+        self.checked = self.checked[mask]
+        self.checked_cells = self.checked_cells[mask]
+        self.remaining = self.remaining[mask]
+        self.ship_cells_left = self.ship_cells_left[mask]
+
+
+def gen_rand_batch(config: ShipConfig, num_of_games, rng: np.random.Generator) -> BatchGrid:
+    lengths = [ship_detail.length for ship_detail in config for i in range(ship_detail.quantity)]
+    width, height = config.width, config.height
+    ship_ids = np.full((num_of_games, width * height), -1, dtype=np.int64)
+    pending = np.arange(num_of_games)
+
+    while len(pending):
+        games = np.arange(len(pending))[:, None]
+        # Cells next to or under a placed ship, plus the padding column that is never set.
+        forbidden = np.zeros((len(pending), width * height + 1), dtype=bool)
+        board = np.full((len(pending), width * height), -1, dtype=np.int64)
+        failed = np.zeros(len(pending), dtype=bool)
+        for ship, length in enumerate(lengths):
+            cells, halos = placement_rows(length, width, height)
+            legal = ~forbidden[:, cells].any(axis=2)
+            failed |= ~legal.any(axis=1)
+            row = np.argmax(np.where(legal, rng.random(legal.shape), -1), axis=1)
+            forbidden[games, halos[row]] = True
+            board[games, cells[row]] = ship
+        # Like BoardGenerator.sample, boards that run into a dead end are drawn again from scratch.
+        ship_ids[pending[~failed]] = board[~failed]
+        pending = pending[failed]
+
+    return BatchGrid(ship_ids, lengths, width, height)
+
+
+class BatchTester:
+    def __init__(self, config=ShipConfig("polish"), batch_size=4096, seed=None, analytic=True):
+        self.config = config
+        self.analytic = analytic
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+
+    def play(self, strategy_class, num_of_games, wins):
+        games = gen_rand_batch(self.config, num_of_games, self.rng)
+        strategy = strategy_class(games, self.rng)
+        while len(games):
+            cells = strategy.pick()
+            results = games.check(cells)
+            strategy.observe(cells, results)
+            won = games.is_won()
+            if won.any():
+                moves, counts = np.unique(games.checked_cells[won], return_counts=True)
+                for move, count in zip(moves, counts):
+                    wins[move] += int(count)
+                games.keep(~won)
+                strategy.keep(~won)
+
+    def test(self, strategy_class, num_of_games):
+        distribution = win_distribution_of(strategy_class, ("pick", "observe", "keep")) if self.analytic else None
+        if distribution is not None:
+            return exact_test(distribution, self.config, num_of_games)
+        wins = [0 for i in range(self.config.width * self.config.height + 1)]
+        left = num_of_games
+        while left > 0:
+            self.play(strategy_class, min(left, self.batch_size), wins)
+            left -= self.batch_size
+        probabilities = wins_to_cumulative_probability(wins, num_of_games)
+        return wins, probabilities
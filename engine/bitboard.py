@@ -0,0 +1,140 @@
+from engine.warships import HIT, MISS, RESULT_NAMES, SUNK, CheckResult, GridPoint, ShipConfig, SunkError, header_row
+
+_tables = {}
+
+
+def board_tables(width, height):
+    # (CELL_BITS, HALOS, FULL_MASK) of a width x height board, built once per size.
+    if (width, height) not in _tables:
+        cell_bits = [1 << i for i in range(width * height)]
+        halos = []
+        for i in range(width * height):
+            x, y = i % width, i // width
+            halo = 0
+            for nx in range(max(x - 1, 0), min(x + 1, width - 1) + 1):
+                for ny in range(max(y - 1, 0), min(y + 1, height - 1) + 1):
+                    halo |= cell_bits[ny * width + nx]
+            halos.append(halo)
+        _tables[width, height] = cell_bits, halos, (1 << (width * height)) - 1
+    return _tables[width, height]
+
+
+# Cell (x, y) is stored at bit y * width + x of every mask. HALOS[i] is the 3x3 neighbourhood of cell i
+# (including the cell itself). These are the tables of the default 10x10 board.
+CELL_BITS, HALOS, FULL_MASK = board_tables(10, 10)
+
+
+def bit_of(point: GridPoint):
+    return 1 << point.index
+
+
+def iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BitGrid:
+    __slots__ = ("width", "height", "halos", "ship_mask", "checked_mask", "ships", "ship_ids", "markers",
+                 "checked_cells", "ship_config")
+
+    def __init__(self, width=10, height=10):
+        self.width, self.height = width, height
+        self.halos = board_tables(width, height)[1]
+        self.ship_mask = 0
+        self.checked_mask = 0
+        self.ships = []  # one mask per ship, in placement order
+        self.ship_ids = [-1] * (width * height)  # index of the ship on every cell, -1 for water
+        self.markers = {}  # marker -> mask of cells carrying it
+        self.checked_cells = 0
+        self.ship_config = ShipConfig(width=width, height=height)
+
+    def place_ship(self, point, direction, length):
+        ship = 0
+        for i in range(length):
+            index = point.index
+            if self.halos[index] & self.ship_mask:
+                raise ValueError("You can't place ship here!")
+            ship |= 1 << index
+            if i < length - 1:
+                point = point.move(direction)
+        self.ship_mask |= ship
+        for index in iter_bits(ship):
+            self.ship_ids[index] = len(self.ships)
+        self.ships.append(ship)
+        self.ship_config.add_ship_of_length(length)
+
+    def check_code(self, point: GridPoint) -> int:
+        ship = self.ship_ids[point.index]
+        if ship >= 0:
+            mask = self.ships[ship]
+            if mask & ~self.checked_mask == 0:
+                raise SunkError("This ship is already sunk!")
+            self.checked_mask |= 1 << point.index
+            code = SUNK if mask & ~self.checked_mask == 0 else HIT
+        else:
+            self.checked_mask |= 1 << point.index
+            code = MISS
+        self.checked_cells += 1
+        return code
+
+    def check(self, point: GridPoint) -> CheckResult:
+        code = self.check_code(point)
+        if code == SUNK:
+            return CheckResult("SUNK", self.length_at(point))
+        return CheckResult(RESULT_NAMES[code])
+
+    def check_many(self, shots):
+        # See Grid.check_many.
+        ship_mask, checked_mask = self.ship_mask, self.checked_mask
+        for point in shots:
+            if ship_mask & ~checked_mask == 0:
+                break
+            bit = 1 << point.index
+            if checked_mask & bit:
+                continue
+            checked_mask |= bit
+            self.checked_cells += 1
+        self.checked_mask = checked_mask
+        return self.checked_cells if ship_mask & ~checked_mask == 0 else None
+
+    def length_at(self, point: GridPoint):
+        ship = self.ship_ids[point.index]
+        return bin(self.ships[ship]).count("1") if ship >= 0 else 0
+
+    def is_checked(self, point):
+        return bool(self.checked_mask & bit_of(point))
+
+    def is_won(self):
+        return self.ship_mask & ~self.checked_mask == 0
+
+    def mark(self, point: GridPoint, marker: str):
+        bit = bit_of(point)
+        for other in self.markers:
+            self.markers[other] &= ~bit
+        if marker is not None:
+            self.markers[marker] = self.markers.get(marker, 0) | bit
+
+    def marker_mask(self, marker):
+        return self.markers.get(marker, 0)
+
+    def __cell_str(self, index):
+        bit = 1 << index
+        for marker, mask in self.markers.items():
+            if mask & bit:
+                return marker
+        if self.ship_mask & bit:
+            return "V" if self.checked_mask & bit else "O"
+        return "X" if self.checked_mask & bit else "."
+
+    def __str__(self):
+        label_width = len(str(self.height - 1))
+        string = header_row(self.width, label_width)
+        for y in range(self.height):
+            string += str(y).rjust(label_width)
+            string += " "
+            for x in range(self.width):
+                string += self.__cell_str(y * self.width + x) + " "
+            string += "\n"
+        return string
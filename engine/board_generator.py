@@ -0,0 +1,192 @@
+import math
+import random
+
+from engine.bitboard import board_tables
+from engine.warships import ShipConfig
+
+
+class Placement:
+    __slots__ = ("length", "x", "y", "direction", "mask", "halo")
+
+    def __init__(self, length, x, y, direction, width=10, height=10):
+        cell_bits, halos = board_tables(width, height)[:2]
+        self.length = length
+        self.x, self.y = x, y
+        self.direction = direction
+        x_delta, y_delta = (1, 0) if direction == "right" else (0, 1)
+        self.mask = 0
+        self.halo = 0
+        for i in range(length):
+            index = (y + y_delta * i) * width + x + x_delta * i
+            self.mask |= cell_bits[index]
+            self.halo |= halos[index]
+
+
+_placements = {}
+
+
+def placements_of_length(length, width=10, height=10):
+    # Every legal position of a ship on an empty width x height board, each listed exactly once.
+    key = (length, width, height)
+    if key not in _placements:
+        placements = []
+        for y in range(height):
+            for x in range(width):
+                if x + length <= width:
+                    placements.append(Placement(length, x, y, "right", width, height))
+                if length > 1 and y + length <= height:
+                    placements.append(Placement(length, x, y, "down", width, height))
+        if not placements:
+            raise ValueError("Ship of length {} does not fit on the board!".format(length))
+        _placements[key] = placements
+    return _placements[key]
+
+
+class BoardGenerator:
+
+    def __init__(self, config: ShipConfig):
+        self.lengths = [ship_detail.length for ship_detail in config for i in range(ship_detail.quantity)]
+        self.width, self.height = config.width, config.height
+        self.tables = [placements_of_length(length, self.width, self.height) for length in self.lengths]
+        self.counts = None  # built by the first uniform board
+        if self.__find_board(0, 0, 0) is None:
+            raise ValueError("Ships of lengths {} can't be placed on the board without touching!".format(
+                self.lengths))
+
+    def __find_board(self, ship, forbidden, first):
+        # Depth-first search for any legal board; ships of equal length are placed in table order so that
+        # no board is visited more than once.
+        if ship == len(self.lengths):
+            return []
+        table = self.tables[ship]
+        for i in range(first, len(table)):
+            placement = table[i]
+            if placement.mask & forbidden:
+                continue
+            next_first = i + 1 if ship + 1 < len(self.lengths) and self.lengths[ship + 1] == placement.length else 0
+            rest = self.__find_board(ship + 1, forbidden | placement.halo, next_first)
+            if rest is not None:
+                return [placement] + rest
+        return None
+
+    def sample(self, rng=random):
+        # Ships are placed one by one, longest first, each uniformly among the positions still legal. A dead
+        # end restarts the board, which always terminates because __init__ proved that a board exists. Boards
+        # aren't equally likely this way: ones whose early ships leave few positions to the later ones are
+        # favoured. sample_uniform draws them exactly uniformly.
+        while True:
+            forbidden = 0
+            ships = []
+            for table in self.tables:
+                legal = [placement for placement in table if not placement.mask & forbidden]
+                if not legal:
+                    break
+                placement = rng.choice(legal)
+                forbidden |= placement.halo
+                ships.append(placement)
+            else:
+                return ships
+
+    def sample_uniform(self, rng=random):
+        # Every legal board is equally likely: the board is scanned cell by cell, and each cell either starts one
+        # of the remaining ships or is skipped, in proportion to the number of boards each choice completes to.
+        if self.counts is None:
+            self.__count_boards()
+        counts, anchored, strides, radixes, bits = self.counts, self.anchored, self.strides, self.radixes, self.bits
+        slot = (1 << bits) - 1
+        fleet = self.fleet
+        forbidden = 0
+        ships = []
+        for cell in range(self.width * self.height):
+            if not fleet:
+                break
+            after = counts[cell + 1]
+            choice = rng.randrange((counts[cell][forbidden] >> fleet * bits) & slot)
+            choice -= (after[forbidden >> 1] >> fleet * bits) & slot
+            if choice >= 0:
+                for placement, kind, mask, halo in anchored[cell]:
+                    if fleet // strides[kind] % radixes[kind] and not mask & forbidden:
+                        choice -= (after[(forbidden | halo) >> 1] >> (fleet - strides[kind]) * bits) & slot
+                        if choice < 0:
+                            ships.append(placement)
+                            fleet -= strides[kind]
+                            forbidden |= halo
+                            break
+            forbidden >>= 1
+        ships.sort(key=lambda placement: -placement.length)
+        return ships
+
+    def __count_boards(self):
+        # counts[cell][forbidden] holds the number of ways to place every fleet (a sub-multiset of the ships) on
+        # the cells from `cell` on, where `forbidden` masks the cells from `cell` on that the ships already placed
+        # rule out. A fleet is a mixed-radix number with a digit per distinct length, and the counts of all the
+        # fleets are packed into one int, a slot of `bits` bits per fleet, so that placing a ship shifts them all
+        # at once. Only the states reachable from an empty board are counted.
+        width, height = self.width, self.height
+        cells = width * height
+        distinct = sorted(set(self.lengths), reverse=True)
+        self.strides, self.radixes = [], []
+        slots = 1
+        bound = 1  # no fleet fits in more ways than this, which sets the width of a slot
+        for length in distinct:
+            quantity = self.lengths.count(length)
+            positions = len(placements_of_length(length, width, height))
+            bound *= math.comb(positions, min(quantity, positions // 2))
+            self.strides.append(slots)
+            self.radixes.append(quantity + 1)
+            slots *= quantity + 1
+        self.bits = bits = bound.bit_length() + 1
+        self.fleet = slots - 1
+        slot = (1 << bits) - 1
+        # fleets[kind]: the slots of fleets that can take one more ship of that kind
+        fleets = [sum(slot << fleet * bits for fleet in range(slots) if fleet // stride % radix < radix - 1)
+                  for stride, radix in zip(self.strides, self.radixes)]
+
+        self.anchored = anchored = [[] for cell in range(cells)]
+        for kind, length in enumerate(distinct):
+            for placement in placements_of_length(length, width, height):
+                cell = placement.y * width + placement.x
+                anchored[cell].append((placement, kind, placement.mask >> cell, placement.halo >> cell))
+
+        reachable = [{0}]
+        for cell in range(cells):
+            states = set()
+            for forbidden in reachable[cell]:
+                states.add(forbidden >> 1)
+                if not forbidden & 1:
+                    for placement, kind, mask, halo in anchored[cell]:
+                        if not mask & forbidden:
+                            states.add((forbidden | halo) >> 1)
+            reachable.append(states)
+
+        shifts = [stride * bits for stride in self.strides]
+        self.counts = counts = [None] * cells + [dict.fromkeys(reachable[cells], 1)]
+        for cell in range(cells - 1, -1, -1):
+            after = counts[cell + 1]
+            current = {}
+            for forbidden in reachable[cell]:
+                total = after[forbidden >> 1]
+                if not forbidden & 1:
+                    for placement, kind, mask, halo in anchored[cell]:
+                        if not mask & forbidden:
+                            total += (after[(forbidden | halo) >> 1] & fleets[kind]) << shifts[kind]
+                current[forbidden] = total
+            counts[cell] = current
+            reachable[cell] = None
+
+    def count(self):
+        # Number of legal boards, ships of equal length being interchangeable.
+        if self.counts is None:
+            self.__count_boards()
+        return (self.counts[0][0] >> self.fleet * self.bits) & ((1 << self.bits) - 1)
+
+
+_generators = {}
+
+
+def board_generator(config: ShipConfig) -> BoardGenerator:
+    key = (config.width, config.height) + tuple(sorted(((ship_detail.length, ship_detail.quantity)
+                                                        for ship_detail in config.config), reverse=True))
+    if key not in _generators:
+        _generators[key] = BoardGenerator(config)
+    return _generators[key]
@@ -0,0 +1,91 @@
+import importlib
+import json
+import os
+
+from engine.warships import ShipConfig
+
+VERSION = 1
+
+
+def class_path(cls):
+    return "{}.{}".format(cls.__module__, cls.__qualname__)
+
+
+def load_class(path):
+    module, name = path.rsplit(".", 1)
+    return getattr(importlib.import_module(module), name)
+
+
+def config_to_list(config: ShipConfig):
+    return [[ship_detail.length, ship_detail.quantity] for ship_detail in config]
+
+
+def config_from_list(details, width=10, height=10):
+    config = ShipConfig(width=width, height=height)
+    for length, quantity in details:
+        config.add_ship_details(length, quantity)
+    return config
+
+
+def add_range(ranges, start, stop):
+    # Keeps a sorted list of disjoint [start, stop) ranges of finished games, merging neighbours.
+    ranges.append([start, stop])
+    ranges.sort()
+    merged = [ranges[0]]
+    for range_start, range_stop in ranges[1:]:
+        if range_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], range_stop)
+        else:
+            merged.append([range_start, range_stop])
+    ranges[:] = merged
+
+
+def in_ranges(ranges, game):
+    for start, stop in ranges:
+        if start <= game < stop:
+            return True
+    return False
+
+
+def temporary_prefix(filename):
+    return ".{}.".format(os.path.basename(filename))
+
+
+def save_checkpoint(filename, state):
+    # Written to a temporary file next to the target and renamed over it, so a crash never leaves a
+    # half-written checkpoint behind. tempfile is imported here, as it pulls in shutil and the compression
+    # modules, which only slow down the startup of everything else that imports this module.
+    import tempfile
+
+    state = dict(state, version=VERSION)
+    directory = os.path.dirname(os.path.abspath(filename))
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=temporary_prefix(filename), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "w") as file:
+            json.dump(state, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, filename)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+        raise
+
+
+def remove_stale_temporaries(filename):
+    # Temporary files of a save_checkpoint that was killed before it could rename or remove its own. Only
+    # safe while nothing else is saving this checkpoint, as when a run resumes it.
+    directory = os.path.dirname(os.path.abspath(filename))
+    prefix = temporary_prefix(filename)
+    for name in os.listdir(directory):
+        # mkstemp's random part has no dots, which tells these apart from the temporaries of "name.other"
+        if name.startswith(prefix) and name.endswith(".tmp") and "." not in name[len(prefix):-len(".tmp")]:
+            os.unlink(os.path.join(directory, name))
+
+
+def load_checkpoint(filename):
+    with open(filename) as file:
+        state = json.load(file)
+    if state.get("version") != VERSION:
+        raise ValueError("{} is not a checkpoint this version can resume!".format(filename))
+    return state
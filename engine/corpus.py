@@ -0,0 +1,104 @@
+import argparse
+import random
+import struct
+
+from engine.board_generator import board_generator
+from engine.fileformat import MappedFile, pack_header, pack_ship_details, unpack_header, unpack_ship_details
+from engine.warships import Grid, GridPoint, ShipConfig
+
+# Header, ship details, then per board: the ship mask and a uint16 per ship (cell * 2, plus 1 if vertical).
+MAGIC = b"PWSC"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBQH")
+
+
+def mask_bytes(width, height):
+    return (width * height + 7) // 8
+
+
+class BoardCorpus(MappedFile):
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        width, height, (count, kinds) = unpack_header(HEADER, self.map, MAGIC, VERSION, filename, "a board corpus")
+        self.count = count
+        self.width, self.height = width, height
+        self.mask_bytes = mask_bytes(width, height)
+        self.config, offset = unpack_ship_details(self.map, HEADER.size, kinds, width, height)
+        self.lengths = [ship_detail.length for ship_detail in self.config for i in range(ship_detail.quantity)]
+        self.layout = struct.Struct("<{}H".format(len(self.lengths)))
+        self.record_size = self.mask_bytes + self.layout.size
+        self.records = memoryview(self.map)[offset:offset + count * self.record_size]
+
+    def __len__(self):
+        return self.count
+
+    def slice(self, start, stop):
+        # Zero-copy view of the records of boards start..stop-1.
+        return self.records[start * self.record_size:stop * self.record_size]
+
+    def mask(self, index):
+        offset = index * self.record_size
+        return int.from_bytes(self.records[offset:offset + self.mask_bytes], "little")
+
+    def ships(self, index):
+        # (x, y, direction, length) of every ship of the board.
+        ships = []
+        layout = self.layout.unpack_from(self.records, index * self.record_size + self.mask_bytes)
+        for code, length in zip(layout, self.lengths):
+            cell = code >> 1
+            ships.append((cell % self.width, cell // self.width, "down" if code & 1 else "right", length))
+        return ships
+
+    def grid(self, index, grid_class=Grid):
+        grid = grid_class(self.width, self.height)
+        for x, y, direction, length in self.ships(index):
+            grid.place_ship(GridPoint(x, y, self.width, self.height), direction, length)
+        return grid
+
+    def close(self):
+        self.records.release()
+        super().close()
+
+
+def write_corpus(filename, config: ShipConfig, num_of_boards, seed=None, uniform=False):
+    generator = board_generator(config)
+    rng = random.Random(seed)
+    layout = struct.Struct("<{}H".format(len(generator.lengths)))
+
+    with open(filename, "wb") as file:
+        file.write(pack_header(HEADER, MAGIC, VERSION, config, num_of_boards, len(config.config)))
+        file.write(pack_ship_details(config))
+        for i in range(num_of_boards):
+            ships = generator.sample_uniform(rng) if uniform else generator.sample(rng)
+            mask = 0
+            codes = []
+            for ship in ships:
+                mask |= ship.mask
+                codes.append((ship.y * config.width + ship.x) * 2 + (ship.direction == "down"))
+            file.write(mask.to_bytes(mask_bytes(config.width, config.height), "little"))
+            file.write(layout.pack(*codes))
+
+
+_open_corpora = {}
+
+
+def open_corpus(filename) -> BoardCorpus:
+    # One mapping per process, shared by every chunk the process plays.
+    if filename not in _open_corpora:
+        _open_corpora[filename] = BoardCorpus(filename)
+    return _open_corpora[filename]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate a corpus of random boards.")
+    parser.add_argument("filename")
+    parser.add_argument("num_of_boards", type=int)
+    parser.add_argument("--config", default="polish")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--uniform", action="store_true")
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--height", type=int, default=10)
+    args = parser.parse_args()
+    config = ShipConfig(args.config, args.width, args.height)
+    write_corpus(args.filename, config, args.num_of_boards, args.seed, args.uniform)
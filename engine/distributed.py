@@ -0,0 +1,321 @@
+import argparse
+import json
+import os
+import random
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from multiprocessing import Process
+
+from engine.analytic import exact_test
+from engine.checkpoint import class_path, config_from_list, config_to_list, load_class
+from engine.stats import Summary
+from engine.strategy_tester import Chunk, StrategyTester, blank_wins, play_chunk, wins_to_cumulative_probability
+from engine.warships import ShipConfig
+
+# Protocol: every message is a 4-byte big-endian length followed by that many bytes of UTF-8 JSON. A worker
+# says {"type": "hello", "name": ...}, then the coordinator sends {"type": "chunk", "chunk": {...}} and waits
+# for {"type": "result", ...} before sending the next chunk, until it sends {"type": "done"}. Strategies and
+# grid classes travel as import paths, so every box needs the same code (and the corpus file, if any).
+LENGTH = struct.Struct(">I")
+
+
+def send_message(sock, message):
+    data = json.dumps(message).encode()
+    sock.sendall(LENGTH.pack(len(data)) + data)
+
+
+def receive_exactly(sock, size):
+    data = b""
+    while len(data) < size:
+        part = sock.recv(size - len(data))
+        if not part:
+            return None
+        data += part
+    return data
+
+
+def receive_message(sock):
+    # The next message, or None if the connection was closed.
+    header = receive_exactly(sock, LENGTH.size)
+    if header is None:
+        return None
+    data = receive_exactly(sock, LENGTH.unpack(header)[0])
+    return json.loads(data) if data is not None else None
+
+
+def chunk_to_dict(chunk: Chunk):
+    return {"strategies": [class_path(strategy) for strategy in chunk.strategies],
+            "config": config_to_list(chunk.config), "width": chunk.config.width, "height": chunk.config.height,
+            "grid_class": class_path(chunk.grid_class), "uniform_boards": chunk.uniform_boards, "seed": chunk.seed,
+            "corpus": chunk.corpus, "first_game": chunk.first_game, "num_of_games": chunk.num_of_games,
+            "opening_book": chunk.opening_book}
+
+
+def chunk_from_dict(message):
+    return Chunk([load_class(path) for path in message["strategies"]],
+                 config_from_list(message["config"], message["width"], message["height"]),
+                 load_class(message["grid_class"]), message["uniform_boards"], message["seed"], message["corpus"],
+                 message["first_game"], message["num_of_games"], opening_book=message["opening_book"])
+
+
+def valid_result(chunk: Chunk, result):
+    # Whether a result is the one of the chunk: its first game, a histogram of all its games for every strategy
+    # and a summary of the differences for every strategy but the first.
+    bins = chunk.config.width * chunk.config.height + 1
+    try:
+        return result["first_game"] == chunk.first_game and len(result["wins"]) == len(chunk.strategies) \
+            and all(len(wins) == bins and min(wins) >= 0 and sum(wins) == chunk.num_of_games
+                    for wins in result["wins"]) \
+            and len(result["differences"]) == len(chunk.strategies) - 1 \
+            and all(len(summary) == 3 and summary[0] == chunk.num_of_games for summary in result["differences"])
+    except (KeyError, TypeError):
+        return False
+
+
+class _Handler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        hello = receive_message(self.request)
+        if hello is None or hello.get("type") != "hello":
+            return
+        name = hello.get("name") or "{}:{}".format(*self.client_address)
+        self.request.settimeout(coordinator.timeout)
+        coordinator.joined(name)
+        try:
+            while True:
+                chunk = coordinator.lease()
+                if chunk is None:
+                    send_message(self.request, {"type": "done"})
+                    return
+                try:
+                    send_message(self.request, {"type": "chunk", "chunk": chunk_to_dict(chunk)})
+                    result = receive_message(self.request)
+                except (OSError, ValueError):
+                    result = None
+                if result is None or result.get("type") != "result" or not valid_result(chunk, result):
+                    # Lost or wrong: the chunk goes back to the queue for another worker.
+                    coordinator.requeue(chunk)
+                    return
+                coordinator.finish(chunk, result, name)
+        finally:
+            coordinator.left(name)
+
+
+class Coordinator:
+    # Hands the chunks of a run to workers connecting over TCP, one chunk per connection at a time, and merges
+    # the histograms they send back. A chunk is re-queued when its worker disconnects or takes longer than
+    # `timeout` seconds. Chunks are the ones StrategyTester would play (ranges of seeded games, or of corpus
+    # boards), so a seeded run gives the results StrategyTester.test or compare gives.
+    #
+    #     coordinator = Coordinator(StrategyTester(seed=1, chunk_size=1000), port=7777)
+    #     wins, probabilities = coordinator.test(AnalyticalStrategy(), 10**9)
+    #
+    # and on every box: python -m engine.distributed worker COORDINATOR:7777 --processes 8
+
+    def __init__(self, tester: StrategyTester, host="127.0.0.1", port=0, timeout=600, report_interval=10,
+                 report=None):
+        self.tester = tester
+        self.host, self.port = host, port
+        self.timeout = timeout
+        self.report_interval = report_interval
+        self.report = report if report is not None else lambda line: print(line, file=sys.stderr)
+        self.address = None
+        self.condition = threading.Condition()
+
+    def test(self, strategy, num_of_games, local_workers=0):
+        distribution = self.tester.exact_distribution(strategy)
+        if distribution is not None:
+            return exact_test(distribution, self.tester.board_config(), num_of_games)
+        wins = self.run([strategy], num_of_games, local_workers)[0][0]
+        return wins, wins_to_cumulative_probability(wins, num_of_games)
+
+    def run(self, strategies, num_of_games, local_workers=0):
+        # Returns the wins of every strategy and the Summary of the differences of every other strategy
+        # against the first one, like the chunks of StrategyTester.run_chunks. With local_workers, that many
+        # worker processes are started on this machine too. Without a seed one is drawn, so that every
+        # strategy plays the same boards.
+        config = self.tester.board_config()
+        seed = self.tester.seed if self.tester.seed is not None else random.randrange(2 ** 32)
+        self.pending = deque(self.tester.chunks(strategies, num_of_games, seed))
+        self.leased = set()
+        self.wins = [blank_wins(config) for strategy in strategies]
+        self.differences = [Summary() for strategy in strategies[1:]]
+        self.games = 0
+        self.requeued = 0
+        self.workers = {}  # name -> games played, of every worker that ever connected
+        self.connected = 0
+
+        server = socketserver.ThreadingTCPServer((self.host, self.port), _Handler, bind_and_activate=False)
+        server.daemon_threads = True
+        server.allow_reuse_address = True
+        server.server_bind()
+        server.server_activate()
+        server.coordinator = self
+        self.address = server.server_address
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        processes = [Process(target=work, args=("127.0.0.1", self.address[1])) for i in range(local_workers)]
+        for process in processes:
+            process.start()
+
+        self.started = time.perf_counter()
+        last_report = self.started
+        try:
+            with self.condition:
+                while self.pending or self.leased:
+                    self.condition.wait(self.report_interval)
+                    if time.perf_counter() - last_report >= self.report_interval:
+                        last_report = time.perf_counter()
+                        self.report(self.status())
+        finally:
+            server.shutdown()
+            server.server_close()
+            for process in processes:
+                process.join()
+        self.elapsed = time.perf_counter() - self.started
+        self.report(self.status())
+        return self.wins, self.differences
+
+    def status(self):
+        elapsed = time.perf_counter() - self.started
+        return "{} games, {:.0f} games/s, {} workers connected, {} chunks re-queued".format(
+            self.games, self.games / elapsed if elapsed else 0, self.connected, self.requeued)
+
+    def games_per_second(self):
+        return self.games / self.elapsed
+
+    def joined(self, name):
+        with self.condition:
+            self.workers.setdefault(name, 0)
+            self.connected += 1
+
+    def left(self, name):
+        with self.condition:
+            self.connected -= 1
+
+    def lease(self):
+        # The next chunk to play, waiting while chunks that may still be re-queued are out; None when done.
+        with self.condition:
+            while not self.pending and self.leased:
+                self.condition.wait()
+            if not self.pending:
+                return None
+            chunk = self.pending.popleft()
+            self.leased.add(chunk.first_game)
+            return chunk
+
+    def requeue(self, chunk):
+        with self.condition:
+            self.leased.discard(chunk.first_game)
+            self.pending.appendleft(chunk)
+            self.requeued += 1
+            self.condition.notify_all()
+
+    def finish(self, chunk, result, name):
+        with self.condition:
+            for strategy_wins, chunk_wins in zip(self.wins, result["wins"]):
+                for moves, games in enumerate(chunk_wins):
+                    strategy_wins[moves] += games
+            for summary, (count, total, total_sq) in zip(self.differences, result["differences"]):
+                summary.merge(Summary(count, total, total_sq))
+            self.games += chunk.num_of_games
+            self.workers[name] += chunk.num_of_games
+            self.leased.discard(chunk.first_game)
+            self.condition.notify_all()
+
+
+def connect(host, port, timeout):
+    # Waits up to `timeout` seconds for the coordinator to come up.
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return socket.create_connection((host, port))
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.5)
+
+
+def play_for(sock, name):
+    # Plays the chunks sent over one connection. True once the coordinator says it is done, False if the
+    # connection is lost, as when the coordinator gave up on a chunk that took too long.
+    try:
+        send_message(sock, {"type": "hello", "name": name})
+        while True:
+            message = receive_message(sock)
+            if message is None:
+                return False
+            if message["type"] == "done":
+                return True
+            first_game, wins, differences, profile, records, traces = play_chunk(chunk_from_dict(message["chunk"]))
+            send_message(sock, {"type": "result", "first_game": first_game, "wins": wins,
+                                "differences": [[summary.count, summary.total, summary.total_sq]
+                                                for summary in differences]})
+    except OSError:
+        return False
+
+
+def work(host, port, name=None, connect_timeout=30):
+    # Plays the chunks a coordinator sends until it says it is done, connecting again whenever the connection is
+    # lost. Waits up to connect_timeout seconds for the coordinator to come up; once it has worked for one, a
+    # coordinator that stays away that long is taken to have finished.
+    name = name or "{}:{}".format(socket.gethostname(), os.getpid())
+    connected = False
+    while True:
+        try:
+            sock = connect(host, port, connect_timeout)
+        except OSError:
+            if connected:
+                return
+            raise
+        connected = True
+        with sock:
+            if play_for(sock, name):
+                return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed simulation: a coordinator and its workers.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    coordinator_parser = commands.add_parser("coordinator", help="hand out the games of a run")
+    coordinator_parser.add_argument("strategy", help="import path, e.g. strategies.random_strategy.RandomStrategy")
+    coordinator_parser.add_argument("num_of_games", type=int)
+    coordinator_parser.add_argument("output", help="file for the wins and probabilities")
+    coordinator_parser.add_argument("--host", default="127.0.0.1",
+                                    help="address to listen on; 0.0.0.0 for workers on other machines")
+    coordinator_parser.add_argument("--port", type=int, default=7777)
+    coordinator_parser.add_argument("--config", default="polish")
+    coordinator_parser.add_argument("--width", type=int, default=10)
+    coordinator_parser.add_argument("--height", type=int, default=10)
+    coordinator_parser.add_argument("--seed", type=int)
+    coordinator_parser.add_argument("--corpus")
+    coordinator_parser.add_argument("--chunk-size", type=int, default=1000)
+    coordinator_parser.add_argument("--timeout", type=float, default=600)
+    coordinator_parser.add_argument("--local-workers", type=int, default=0)
+    worker_parser = commands.add_parser("worker", help="play games for a coordinator")
+    worker_parser.add_argument("address", help="HOST:PORT of the coordinator")
+    worker_parser.add_argument("--processes", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.command == "coordinator":
+        tester = StrategyTester(config=ShipConfig(args.config, args.width, args.height), seed=args.seed,
+                                corpus=args.corpus, chunk_size=args.chunk_size)
+        coordinator = Coordinator(tester, args.host, args.port, args.timeout)
+        wins, probabilities = coordinator.test(load_class(args.strategy)(), args.num_of_games, args.local_workers)
+        with open(args.output, "w") as file:
+            file.writelines((str(wins), "\n", str(probabilities)))
+        for name, games in sorted(coordinator.workers.items()):
+            print("{:<32}{:>14} games".format(name, games), file=sys.stderr)
+        print("{:.0f} games/s".format(coordinator.games_per_second()), file=sys.stderr)
+    else:
+        host, port = args.address.rsplit(":", 1)
+        workers = [Process(target=work, args=(host, int(port))) for i in range(args.processes)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
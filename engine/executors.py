@@ -0,0 +1,149 @@
+import queue
+
+from engine.board_generator import board_generator
+from engine.warships import ShipConfig, board_points
+from strategies.placement_density import placements_for
+
+# multiprocessing and concurrent.futures are imported by the executors that use them: together they take
+# longer to import than the rest of the engine, which a one-process run (python -m engine) never needs.
+
+
+def warm_tables(configs, uniform=False):
+    # Builds the per-size tables of every config: interned points, bit masks, ship placements (of the board
+    # generator and of AnalyticalStrategy's density), and with `uniform` the board counts uniform boards are
+    # drawn from. All of them are module-level caches, so processes forked afterwards inherit them instead of
+    # building their own.
+    for config in configs:
+        board_points(config.width, config.height)
+        generator = board_generator(config)
+        if uniform:
+            generator.count()
+        placements_for([ship_detail.length for ship_detail in config], config.width, config.height)
+
+
+class Executor:
+    # Plays chunks for StrategyTester: imap_unordered(function, chunks) yields the results in any order.
+    # submit(function, chunk, callback, error_callback) plays one chunk and passes its result or error to a
+    # callback, possibly from another thread, for schedulers of their own (SimulationPool, Tournament).
+    # `threaded` executors run chunks of one process at the same time, which instrumentation doesn't allow.
+    workers = 1
+    threaded = False
+
+    def imap_unordered(self, function, iterable):
+        raise NotImplementedError
+
+    def submit(self, function, item, callback, error_callback):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+class SerialExecutor(Executor):
+    # Plays the chunks one by one in this process: no startup cost and no pickling.
+
+    def imap_unordered(self, function, iterable):
+        for item in iterable:
+            yield function(item)
+
+    def submit(self, function, item, callback, error_callback):
+        # Plays the chunk before it returns.
+        try:
+            result = function(item)
+        except Exception as error:
+            error_callback(error)
+        else:
+            callback(result)
+
+
+class ThreadExecutor(Executor):
+    # Plays the chunks on threads of this process, which runs them in parallel only on a free-threaded
+    # Python build. A run that stops early cancels the chunks that haven't started; the running ones finish.
+    # Like ProcessExecutor, it builds the tables of `configs` first, so that chunks don't race to build them.
+    threaded = True
+
+    def __init__(self, workers=1, configs=(ShipConfig("polish"),), uniform=False):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.workers = workers
+        warm_tables(configs, uniform)
+        self.pool = ThreadPoolExecutor(workers)
+
+    def imap_unordered(self, function, iterable):
+        from concurrent.futures import as_completed
+
+        futures = [self.pool.submit(function, item) for item in iterable]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def submit(self, function, item, callback, error_callback):
+        def settled(future):
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                error_callback(future.exception())
+            else:
+                callback(future.result())
+
+        self.pool.submit(function, item).add_done_callback(settled)
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+class ProcessExecutor(Executor):
+    # A process pool that stays up between runs. The tables of `configs` are built before the workers start:
+    # forked workers inherit them, and with the spawn or forkserver start methods every worker builds them
+    # once when it starts. Either way no task carries them. At most two chunks per worker are queued at a
+    # time, so a run that stops early (test_until) leaves little work behind for the next one; the chunks
+    # already handed to the workers can't be cancelled and finish in the background. Runs of uniform boards
+    # need `uniform`, or every worker counts the boards again.
+
+    def __init__(self, workers=1, configs=(ShipConfig("polish"),), uniform=False):
+        import multiprocessing
+
+        self.workers = workers
+        configs = list(configs)
+        warm_tables(configs, uniform)
+        self.pool = multiprocessing.Pool(workers, warm_tables, (configs, uniform))
+
+    def imap_unordered(self, function, iterable):
+        finished = queue.Queue()
+        items = iter(iterable)
+        running = 0
+
+        def submit_next():
+            item = next(items, None)
+            if item is None:
+                return 0
+            self.submit(function, item, lambda result: finished.put((True, result)),
+                        lambda error: finished.put((False, error)))
+            return 1
+
+        for i in range(2 * self.workers):
+            running += submit_next()
+        while running:
+            ok, result = finished.get()
+            if not ok:
+                raise result
+            running += submit_next() - 1
+            yield result
+
+    def submit(self, function, item, callback, error_callback):
+        # The callbacks run on the pool's result thread.
+        self.pool.apply_async(function, (item,), callback=callback, error_callback=error_callback)
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
@@ -0,0 +1,61 @@
+import json
+import mmap
+import struct
+
+from engine.checkpoint import config_from_list, config_to_list
+from engine.warships import ShipConfig
+
+# The binary files (board corpus, opening book, results, traces) share these: a header that starts with the
+# magic, the format version and the board size, then the ship config, as (length, quantity) pairs or in a
+# JSON description.
+SHIP_DETAILS = struct.Struct("<HH")
+
+
+def pack_header(header: struct.Struct, magic, version, config: ShipConfig, *fields):
+    return header.pack(magic, version, config.width, config.height, *fields)
+
+
+def unpack_header(header: struct.Struct, data, magic, version, filename, kind):
+    # (width, height, the other fields), or ValueError if the data isn't a file of this kind and version.
+    file_magic, file_version, width, height, *fields = header.unpack_from(data, 0)
+    if file_magic != magic or file_version != version:
+        raise ValueError("{} is not {}!".format(filename, kind))
+    return width, height, fields
+
+
+def pack_ship_details(config: ShipConfig):
+    return b"".join(SHIP_DETAILS.pack(length, quantity) for length, quantity in config_to_list(config))
+
+
+def unpack_ship_details(data, offset, kinds, width, height):
+    # (config, offset past the details)
+    details = [SHIP_DETAILS.unpack_from(data, offset + i * SHIP_DETAILS.size) for i in range(kinds)]
+    return config_from_list(details, width, height), offset + kinds * SHIP_DETAILS.size
+
+
+def pack_description(description):
+    return json.dumps(description).encode()
+
+
+def unpack_description(data, offset, size):
+    return json.loads(bytes(data[offset:offset + size]))
+
+
+class MappedFile:
+    # A whole file mapped read-only.
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
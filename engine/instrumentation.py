@@ -0,0 +1,117 @@
+import time
+
+from engine.stats import Summary
+
+# The Profile of the chunk the current process is playing, or None when instrumentation is off. Strategies
+# record their own timers and counters with timer(name) and count(name), which do nothing while it is None.
+active = None
+
+
+class Profile:
+    # Timers hold a Summary of seconds per timed section, values a Summary of observed sizes, and counters
+    # plain totals. Everything merges, so workers profile their chunks and the tester adds them up.
+
+    def __init__(self):
+        self.timers = {}
+        self.values = {}
+        self.counters = {}
+
+    def add_time(self, name, seconds):
+        if name not in self.timers:
+            self.timers[name] = Summary()
+        self.timers[name].add(seconds)
+
+    def observe(self, name, value):
+        if name not in self.values:
+            self.values[name] = Summary()
+        self.values[name].add(value)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, other):
+        for mine, theirs in ((self.timers, other.timers), (self.values, other.values)):
+            for name, summary in theirs.items():
+                if name not in mine:
+                    mine[name] = Summary()
+                mine[name].merge(summary)
+        for name, n in other.counters.items():
+            self.count(name, n)
+
+    def __str__(self):
+        games = self.counters.get("games", 0)
+        string = "{:<28}{:>12}{:>14}{:>14}\n".format("timer", "count", "total s", "mean ms")
+        for name, summary in sorted(self.timers.items()):
+            string += "{:<28}{:>12}{:>14.3f}{:>14.4f}\n".format(name, summary.count, summary.total,
+                                                               summary.mean() * 1000)
+        string += "{:<28}{:>12}{:>14}{:>14}\n".format("value", "count", "mean", "std dev")
+        for name, summary in sorted(self.values.items()):
+            string += "{:<28}{:>12}{:>14.2f}{:>14.2f}\n".format(name, summary.count, summary.mean(),
+                                                               summary.variance() ** 0.5)
+        string += "{:<28}{:>12}{:>14}\n".format("counter", "total", "per game")
+        for name, n in sorted(self.counters.items()):
+            string += "{:<28}{:>12}{:>14.2f}\n".format(name, n, n / games if games else 0)
+        return string
+
+
+class _Timer:
+    __slots__ = ("profile", "name", "start")
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_null_timer = _NullTimer()
+
+
+def timer(name):
+    # `with timer("my phase"):` adds the time spent in the block to the named timer of the active profile.
+    if active is None:
+        return _null_timer
+    return _Timer(active, name)
+
+
+def count(name, n=1):
+    if active is not None:
+        active.count(name, n)
+
+
+class CallCounter:
+    # Counts the calls of a method of a class in the given profile until restore() puts the method back.
+
+    def __init__(self, profile, cls, method, counter):
+        self.cls = cls
+        self.method = method
+        self.own = method in cls.__dict__
+        self.original = getattr(cls, method)
+        original = self.original
+
+        def counted(*args, **kwargs):
+            profile.counters[counter] = profile.counters.get(counter, 0) + 1
+            return original(*args, **kwargs)
+
+        setattr(cls, method, counted)
+
+    def restore(self):
+        if self.own:
+            setattr(self.cls, self.method, self.original)
+        else:
+            delattr(self.cls, self.method)
@@ -0,0 +1,138 @@
+import argparse
+import random
+import struct
+from collections import OrderedDict
+
+from engine.corpus import mask_bytes
+from engine.fileformat import pack_header, pack_ship_details, unpack_header, unpack_ship_details
+from engine.warships import ShipConfig, gen_rand_grid
+
+# Header, ship details, then per decision, least recently used first: the blocked mask and a DECISION.
+MAGIC = b"PWOB"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBHQH")
+DECISION = struct.Struct("<HH")  # a bit per ship length afloat (config order), the cell to fire at
+
+
+class OpeningBook:
+    # LRU map of AnalyticalStrategy's hunt decisions, (blocked cells, lengths afloat) -> cell, of at most
+    # `max_size` entries and, with `depth`, only of decisions before that many shots.
+
+    def __init__(self, config: ShipConfig, max_size=100000, depth=None, read_only=False):
+        self.width, self.height = config.width, config.height
+        self.config = config
+        self.lengths = [ship_detail.length for ship_detail in config]
+        self.max_size = max_size
+        self.depth = depth
+        self.read_only = read_only
+        self.decisions = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def fits(self, width, height, lengths):
+        return (self.width, self.height, self.lengths) == (width, height, list(lengths))
+
+    def key(self, blocked, alive_ships):
+        afloat = 0
+        for i, length in enumerate(self.lengths):
+            if alive_ships[length]:
+                afloat |= 1 << i
+        return blocked << 16 | afloat
+
+    def get(self, key):
+        cell = self.decisions.get(key)
+        if cell is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if not self.read_only:
+            self.decisions.move_to_end(key)
+        return cell
+
+    def put(self, key, cell):
+        if self.read_only:
+            return
+        self.decisions[key] = cell
+        if len(self.decisions) > self.max_size:
+            self.decisions.popitem(last=False)
+            self.evictions += 1
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def __len__(self):
+        return len(self.decisions)
+
+    def __str__(self):
+        return "{} decisions, {} hits, {} misses ({:.1%} hit rate), {} evictions".format(
+            len(self), self.hits, self.misses, self.hit_rate(), self.evictions)
+
+    def save(self, filename):
+        size = mask_bytes(self.width, self.height)
+        with open(filename, "wb") as file:
+            file.write(pack_header(HEADER, MAGIC, VERSION, self.config, self.depth or 0, len(self.decisions),
+                                   len(self.config.config)))
+            file.write(pack_ship_details(self.config))
+            for key, cell in self.decisions.items():
+                file.write((key >> 16).to_bytes(size, "little"))
+                file.write(DECISION.pack(key & 0xFFFF, cell))
+
+    @classmethod
+    def load(cls, filename, read_only=True, max_size=None):
+        with open(filename, "rb") as file:
+            data = file.read()
+        width, height, (depth, count, kinds) = unpack_header(HEADER, data, MAGIC, VERSION, filename,
+                                                             "an opening book")
+        config, offset = unpack_ship_details(data, HEADER.size, kinds, width, height)
+        book = cls(config, max(count, max_size or 0), depth or None, read_only)
+        size = mask_bytes(width, height)
+        for i in range(count):
+            blocked = int.from_bytes(data[offset:offset + size], "little")
+            afloat, cell = DECISION.unpack_from(data, offset + size)
+            book.decisions[blocked << 16 | afloat] = cell
+            offset += size + DECISION.size
+        return book
+
+
+_open_books = {}
+
+
+def open_book(filename) -> OpeningBook:
+    # One read-only copy per process, shared by every chunk the process plays.
+    if filename not in _open_books:
+        _open_books[filename] = OpeningBook.load(filename)
+    return _open_books[filename]
+
+
+def build_book(config: ShipConfig, num_of_games, max_size=100000, depth=12, seed=None):
+    # Plays AnalyticalStrategy with a writable book and returns the book.
+    from strategies.analytical_strategy import AnalyticalStrategy
+
+    book = OpeningBook(config, max_size, depth)
+    board_rng = random.Random(seed)
+    strategy = AnalyticalStrategy()
+    if seed is not None:
+        strategy.rng = random.Random(seed)
+    strategy.book = book
+    for i in range(num_of_games):
+        strategy.run(gen_rand_grid(config, rng=board_rng))
+    return book
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build an opening book of AnalyticalStrategy hunt decisions.")
+    parser.add_argument("filename")
+    parser.add_argument("num_of_games", type=int)
+    parser.add_argument("--config", default="polish")
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--height", type=int, default=10)
+    parser.add_argument("--max-size", type=int, default=100000)
+    parser.add_argument("--depth", type=int, default=12, help="store decisions of the first DEPTH shots only")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    book = build_book(ShipConfig(args.config, args.width, args.height), args.num_of_games, args.max_size,
+                      args.depth, args.seed)
+    book.save(args.filename)
+    print(book)
@@ -0,0 +1,197 @@
+import random
+import time
+
+from engine.bitboard import board_tables, iter_bits
+from engine.board_generator import placements_of_length
+from engine.warships import HIT, MISS, ShipConfig
+
+
+class PosteriorSampler:
+    # Keeps a population of boards (particles) consistent with every shot observed so far: no ship on a miss
+    # or next to a sunk ship, every hit covered by a ship that isn't fully hit yet, and the sunk ships
+    # removed from the fleet. After a shot the boards that contradict it are dropped and replaced by copies
+    # of the survivors, so the samples of the previous move are reused. The population is kept mixing with
+    # Gibbs steps: one ship of one board is moved to a uniformly chosen position among those the rest of the
+    # board allows, which leaves the uniform distribution over consistent boards unchanged. Every step also
+    # adds the average occupancy of all the positions it could have chosen to the cell scores
+    # (Rao-Blackwellization), which lowers their variance. Those positions differ in one ship only, so they
+    # are far from being that many independent boards.
+
+    def __init__(self, config: ShipConfig, rng=random, particles=32, max_tries=1000):
+        self.width, self.height = config.width, config.height
+        self.rng = rng
+        self.num_of_particles = particles
+        self.max_tries = max_tries
+        self.halos = board_tables(self.width, self.height)[1]
+        self.lengths = [ship_detail.length for ship_detail in config for i in range(ship_detail.quantity)]
+        self.tables = {length: placements_of_length(length, self.width, self.height) for length in self.lengths}
+        self.covering = [{length: [] for length in self.tables} for i in range(self.width * self.height)]
+        self.cells_of = {}
+        for length, table in self.tables.items():
+            for placement in table:
+                cells = tuple(iter_bits(placement.mask))
+                self.cells_of[placement] = cells
+                for cell in cells:
+                    self.covering[cell][length].append(placement)
+
+        self.checked = 0
+        self.water = 0  # misses, sunk ships and the cells around them
+        self.hits = 0  # hits of ships that aren't sunk yet
+        self.candidates = dict(self.tables)
+        self.particles = [self.construct() for i in range(particles)]
+        self.weights = {}
+        self.steps = 0
+        self.weighed = 0  # positions weighed by all steps; not independent boards, see above
+
+    def __allowed(self, placement, forbidden):
+        # On no forbidden cell, and not fully hit already (the ship would have been sunk).
+        return not placement.mask & forbidden and placement.mask & ~self.hits
+
+    def __update_candidates(self):
+        forbidden = self.water
+        self.candidates = {length: [placement for placement in table if self.__allowed(placement, forbidden)]
+                           for length, table in self.candidates.items()}
+
+    def construct(self):
+        # A board consistent with the observations, built from scratch: hits are covered first, by a
+        # randomized depth-first search, then the other ships are placed one by one, restarting on a dead end.
+        for tries_count in range(self.max_tries):
+            budget = [100]
+            board = self.__cover(list(self.lengths), [], 0, self.water, budget)
+            if board is not None:
+                return board
+        raise ValueError("No board is consistent with the shots so far!")
+
+    def __cover(self, lengths, ships, mask, forbidden, budget):
+        needed = self.hits & ~mask
+        if not needed:
+            return self.__fill(lengths, ships, forbidden)
+        cell = (needed & -needed).bit_length() - 1
+        options = [placement for length in set(lengths) for placement in self.covering[cell][length]
+                   if self.__allowed(placement, forbidden)]
+        self.rng.shuffle(options)
+        for placement in options:
+            budget[0] -= 1
+            if budget[0] < 0:
+                return None
+            rest = list(lengths)
+            rest.remove(placement.length)
+            board = self.__cover(rest, ships + [placement], mask | placement.mask, forbidden | placement.halo,
+                                 budget)
+            if board is not None:
+                return board
+        return None
+
+    def __fill(self, lengths, ships, forbidden):
+        ships = list(ships)
+        for length in sorted(lengths, reverse=True):
+            legal = [placement for placement in self.candidates[length] if not placement.mask & forbidden]
+            if not legal:
+                return None
+            placement = self.rng.choice(legal)
+            forbidden |= placement.halo
+            ships.append(placement)
+        return ships
+
+    def observe(self, cell, code):
+        bit = 1 << cell
+        self.checked |= bit
+        if code == MISS:
+            self.water |= bit
+            survivors = [board for board in self.particles if not any(ship.mask & bit for ship in board)]
+        elif code == HIT:
+            self.hits |= bit
+            survivors = [board for board in self.particles if self.__explains_hit(board, bit)]
+        else:
+            ship = self.__sunk_ship(bit)
+            self.hits &= ~ship
+            self.water |= self.__halo(ship)
+            self.lengths.remove(bin(ship).count("1"))
+            survivors = []
+            for board in self.particles:
+                rest = [placement for placement in board if placement.mask != ship]
+                if len(rest) == len(board) - 1:
+                    survivors.append(rest)
+        self.__update_candidates()
+        if not survivors:
+            survivors = [self.construct()]
+        self.particles = [list(self.rng.choice(survivors)) for i in range(self.num_of_particles - len(survivors))]
+        self.particles += survivors
+        self.weights = {}
+
+    def __explains_hit(self, board, bit):
+        for ship in board:
+            if ship.mask & bit:
+                return ship.mask & ~self.hits != 0
+        return False
+
+    def __sunk_ship(self, bit):
+        # Ships never touch, so the sunk ship is the group of hits connected to the last one.
+        ship = bit
+        while True:
+            grown = self.__halo(ship) & (self.hits | bit)
+            if grown == ship:
+                return ship
+            ship = grown
+
+    def __halo(self, mask):
+        halo = 0
+        for cell in iter_bits(mask):
+            halo |= self.halos[cell]
+        return halo
+
+    def step(self, board, i):
+        others_mask = 0
+        others_halo = 0
+        for j, ship in enumerate(board):
+            if j != i:
+                others_mask |= ship.mask
+                others_halo |= ship.halo
+        needed = self.hits & ~others_mask
+        length = board[i].length
+        if needed:
+            cell = (needed & -needed).bit_length() - 1
+            forbidden = others_halo | self.water
+            options = [placement for placement in self.covering[cell][length]
+                       if not placement.mask & forbidden and not needed & ~placement.mask
+                       and placement.mask & ~self.hits]
+        else:
+            options = [placement for placement in self.candidates[length] if not placement.mask & others_halo]
+        weight = 1 / len(options)
+        weights = self.weights
+        for placement in options:
+            weights[placement] = weights.get(placement, 0) + weight
+        board[i] = self.rng.choice(options)
+        self.steps += 1
+        self.weighed += len(options)
+
+    def sample(self, steps=None, time_budget=None):
+        # Gibbs steps over the particles in turn, `steps` of them or until `time_budget` seconds have passed,
+        # but at least one sweep over the ships of one board.
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        done = 0
+        while True:
+            for board in self.particles:
+                for i in range(len(board)):
+                    self.step(board, i)
+                    done += 1
+                if steps is not None and done >= steps:
+                    return
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+
+    def scores(self):
+        # Expected number of ships on every cell, from the steps since the last shot.
+        scores = [0.0] * (self.width * self.height)
+        for placement, weight in self.weights.items():
+            for cell in self.cells_of[placement]:
+                scores[cell] += weight
+        return scores
+
+    def best_cell(self):
+        scores = self.scores()
+        best, best_score = None, -1.0
+        for cell, score in enumerate(scores):
+            if score > best_score and not self.checked >> cell & 1:
+                best, best_score = cell, score
+        return best
@@ -0,0 +1,226 @@
+import argparse
+import os
+import struct
+
+from engine.checkpoint import config_from_list, config_to_list
+from engine.fileformat import MappedFile, pack_description, pack_header, unpack_description, unpack_header
+from engine.stats import HistogramStats
+from engine.strategy_tester import BOARD_STREAM, game_seed, wins_to_cumulative_probability
+from engine.warships import ShipConfig
+
+# Header, JSON description, a uint64 per number of moves (rewritten in place by every flush), then the RECORDs.
+MAGIC = b"PWRS"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBBI")
+RECORD = struct.Struct("<HHQf")  # moves, source, game (or corpus board), strategy seconds
+COUNT = struct.Struct("<Q")
+
+
+def _describe(strategy, config: ShipConfig, sources):
+    return {"strategy": strategy, "config": config_to_list(config), "sources": sources}
+
+
+class ResultsFile(MappedFile):
+    # The histogram is read at once, the records lazily.
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        width, height, (has_records, description_size) = unpack_header(HEADER, self.map, MAGIC, VERSION, filename,
+                                                                       "a results file")
+        self.width, self.height = width, height
+        self.has_records = bool(has_records)
+        description = unpack_description(self.map, HEADER.size, description_size)
+        self.strategy = description["strategy"]
+        self.config = config_from_list(description["config"], width, height)
+        self.sources = description["sources"]
+        self.histogram_offset = HEADER.size + description_size
+        bins = width * height + 1
+        self.wins = list(struct.unpack_from("<{}Q".format(bins), self.map, self.histogram_offset))
+        self.records_offset = self.histogram_offset + bins * COUNT.size
+        self.count = (len(self.map) - self.records_offset) // RECORD.size if self.has_records else 0
+
+    def __len__(self):
+        return self.count
+
+    def games(self):
+        return sum(self.wins)
+
+    def probabilities(self):
+        return wins_to_cumulative_probability(self.wins, self.games())
+
+    def stats(self):
+        return HistogramStats(self.wins)
+
+    def record(self, index):
+        # (moves, source, game, seconds)
+        return RECORD.unpack_from(self.map, self.records_offset + index * RECORD.size)
+
+    def records(self, start=0, stop=None, block=65536):
+        # Iterates over the records start..stop-1, unpacking `block` of them at a time.
+        stop = self.count if stop is None else min(stop, self.count)
+        for first in range(start, stop, block):
+            last = min(first + block, stop)
+            yield from RECORD.iter_unpack(self.map[self.records_offset + first * RECORD.size:
+                                                   self.records_offset + last * RECORD.size])
+
+    def board(self, source, game):
+        # Where the board of a record came from: ("corpus", filename, index) or ("seed", board seed), the seed
+        # gen_rand_grid's rng was seeded with.
+        source = self.sources[source]
+        if source.get("corpus") is not None:
+            return "corpus", source["corpus"], game
+        return "seed", game_seed(source["seed"], game, BOARD_STREAM)
+
+
+class ResultsWriter:
+    # Writes a results file while a run goes on: add() or add_chunk() buffer results, flush() writes the
+    # buffered records and then the updated histogram. create() starts a file, append() continues one.
+
+    def __init__(self, file, histogram_offset, wins, sources, has_records):
+        self.file = file
+        self.histogram_offset = histogram_offset
+        self.wins = wins
+        self.sources = sources
+        self.source = len(sources) - 1
+        self.has_records = has_records
+        self.buffer = []
+
+    @classmethod
+    def create(cls, filename, strategy, config: ShipConfig, sources, records=True):
+        description = pack_description(_describe(strategy, config, sources))
+        wins = [0] * (config.width * config.height + 1)
+        file = open(filename, "wb")
+        file.write(pack_header(HEADER, MAGIC, VERSION, config, records, len(description)))
+        file.write(description)
+        file.write(struct.pack("<{}Q".format(len(wins)), *wins))
+        file.flush()
+        return cls(file, HEADER.size + len(description), wins, sources, records)
+
+    @classmethod
+    def append(cls, filename):
+        # Continues a file, adding to its histogram and, if it has them, to its records of the last source.
+        with ResultsFile(filename) as results:
+            writer_args = results.histogram_offset, results.wins, results.sources, results.has_records
+            size = results.records_offset + results.count * RECORD.size
+        file = open(filename, "r+b")
+        file.truncate(size)  # a record cut short by a crash
+        return cls(file, *writer_args)
+
+    def add(self, moves, game=0, seconds=0.0):
+        self.wins[moves] += 1
+        if self.has_records:
+            self.buffer.append(RECORD.pack(moves, self.source, game, seconds))
+
+    def add_chunk(self, wins, records=None):
+        # The histogram of a chunk and, for a file with records, its (game, moves, seconds) records.
+        for moves, games in enumerate(wins):
+            self.wins[moves] += games
+        if self.has_records and records is not None:
+            self.buffer.extend(RECORD.pack(moves, self.source, game, seconds) for game, moves, seconds in records)
+
+    def flush(self):
+        self.file.seek(0, os.SEEK_END)
+        self.file.write(b"".join(self.buffer))
+        self.buffer = []
+        self.file.seek(self.histogram_offset)
+        self.file.write(struct.pack("<{}Q".format(len(self.wins)), *self.wins))
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def _game_ranges(results, block):
+    # The first and the last game of every source with records in a file.
+    ranges = {}
+    for moves, source, game, seconds in results.records(block=block):
+        first, last = ranges.get(source, (game, game))
+        ranges[source] = min(first, game), max(last, game)
+    return ranges
+
+
+def merge_results(output, filenames, block=65536):
+    # Sums the histograms and streams the records, merging equal sources; records only if every input has them.
+    inputs = [ResultsFile(filename) for filename in filenames]
+    try:
+        first = inputs[0]
+        for results in inputs[1:]:
+            if (results.strategy, results.width, results.height) != (first.strategy, first.width, first.height) \
+                    or config_to_list(results.config) != config_to_list(first.config):
+                raise ValueError("{} and {} have different strategies or configs!".format(first.filename,
+                                                                                         results.filename))
+        sources = []
+        renumbering = []
+        for results in inputs:
+            numbers = []
+            for source in results.sources:
+                if source not in sources:
+                    sources.append(source)
+                numbers.append(sources.index(source))
+            renumbering.append(numbers)
+
+        # A source in more than one input must hold different games in each, or they would be counted twice.
+        has_records = all(results.has_records for results in inputs)
+        taken = {}
+        for results, numbers in zip(inputs, renumbering):
+            ranges = _game_ranges(results, block) if has_records else {}
+            for source, number in enumerate(numbers):
+                if has_records and source not in ranges:
+                    continue
+                games = ranges.get(source)
+                for filename, other_games in taken.get(number, []):
+                    if games is None or games[0] <= other_games[1] and other_games[0] <= games[1]:
+                        raise ValueError("{} and {} may hold the same games of {}!".format(
+                            filename, results.filename, sources[number]))
+                taken.setdefault(number, []).append((results.filename, games))
+
+        with ResultsWriter.create(output, first.strategy, first.config, sources, has_records) as writer:
+            for results, numbers in zip(inputs, renumbering):
+                for moves, games in enumerate(results.wins):
+                    writer.wins[moves] += games
+                if not has_records:
+                    continue
+                for start in range(0, results.count, block):
+                    writer.buffer = [RECORD.pack(moves, numbers[source], game, seconds)
+                                     for moves, source, game, seconds in results.records(start, start + block)]
+                    writer.flush()
+    finally:
+        for results in inputs:
+            results.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and merge results files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    show_parser = commands.add_parser("show", help="summary of a results file")
+    show_parser.add_argument("filename")
+    text_parser = commands.add_parser("text", help="wins and probabilities as text, like test_to_file used to")
+    text_parser.add_argument("filename")
+    merge_parser = commands.add_parser("merge", help="combine results files")
+    merge_parser.add_argument("output")
+    merge_parser.add_argument("filenames", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "merge":
+        merge_results(args.output, args.filenames)
+    else:
+        with ResultsFile(args.filename) as results:
+            if args.command == "text":
+                print(results.wins)
+                print(results.probabilities())
+            else:
+                stats = results.stats()
+                print("{} on {}x{}, {} games, {} records, {} sources".format(
+                    results.strategy, results.width, results.height, stats.count, len(results),
+                    len(results.sources)))
+                print("mean {:.3f} +-{:.3f}, p10 {}, p50 {}, p90 {}".format(
+                    stats.mean(), stats.mean_half_width(), stats.quantile(0.1), stats.quantile(0.5),
+                    stats.quantile(0.9)))
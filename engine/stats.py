@@ -0,0 +1,122 @@
+from math import log, sqrt
+from statistics import NormalDist
+
+
+class Summary:
+    # Count, sum and sum of squares of integer samples (moves, differences of moves). Integer sums merge
+    # exactly, so the result doesn't depend on how games were split between workers.
+
+    def __init__(self, count=0, total=0, total_sq=0):
+        self.count = count
+        self.total = total
+        self.total_sq = total_sq
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.total_sq += value * value
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+
+    @classmethod
+    def from_wins(cls, wins):
+        summary = cls()
+        for moves, games in enumerate(wins):
+            summary.count += games
+            summary.total += moves * games
+            summary.total_sq += moves * moves * games
+        return summary
+
+    def mean(self):
+        return self.total / self.count
+
+    def variance(self):
+        if self.count < 2:
+            return 0.0
+        return (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+
+    def std_error(self):
+        return sqrt(self.variance() / self.count)
+
+    def confidence_interval(self, z=1.96):
+        half_width = z * self.std_error()
+        return self.mean() - half_width, self.mean() + half_width
+
+
+class PairedComparison:
+    # Moves of `challenger` minus moves of `baseline`, played on the same boards.
+
+    def __init__(self, baseline, challenger, differences: Summary, baseline_wins, challenger_wins):
+        self.baseline = baseline
+        self.challenger = challenger
+        self.differences = differences
+        self.baseline_moves = Summary.from_wins(baseline_wins)
+        self.challenger_moves = Summary.from_wins(challenger_wins)
+
+    def mean(self):
+        return self.differences.mean()
+
+    def confidence_interval(self, z=1.96):
+        return self.differences.confidence_interval(z)
+
+    def unpaired_std_error(self):
+        # What the standard error of the difference would be with independent boards for both strategies.
+        return sqrt(self.baseline_moves.variance() / self.baseline_moves.count +
+                    self.challenger_moves.variance() / self.challenger_moves.count)
+
+    def variance_reduction(self):
+        # How many times more games independent boards would need for the same precision.
+        paired = self.differences.std_error()
+        if paired == 0:
+            return float("inf")
+        return (self.unpaired_std_error() / paired) ** 2
+
+    def __str__(self):
+        low, high = self.confidence_interval()
+        return "{} - {}: {:+.3f} moves, 95% CI [{:+.3f}, {:+.3f}], {:.1f}x fewer games than unpaired".format(
+            self.challenger, self.baseline, self.mean(), low, high, self.variance_reduction())
+
+
+def z_score(confidence):
+    return NormalDist().inv_cdf((1 + confidence) / 2)
+
+
+class HistogramStats:
+    # Running statistics of a `wins` histogram: wins[x] games were won in x moves.
+
+    def __init__(self, wins):
+        self.wins = wins
+        self.moves = Summary.from_wins(wins)
+        self.count = self.moves.count
+
+    def mean(self):
+        return self.moves.mean()
+
+    def variance(self):
+        return self.moves.variance()
+
+    def mean_half_width(self, confidence=0.95):
+        return z_score(confidence) * self.moves.std_error()
+
+    def quantile(self, q):
+        # Smallest number of moves that wins at least a fraction q of the games.
+        needed = q * self.count
+        games = 0
+        for moves, won in enumerate(self.wins):
+            games += won
+            if games >= needed and games > 0:
+                return moves
+        return len(self.wins) - 1
+
+    def band_half_width(self, confidence=0.95):
+        # Dvoretzky-Kiefer-Wolfowitz: the whole cumulative curve lies within this distance of the empirical
+        # one with the given confidence.
+        return sqrt(log(2 / (1 - confidence)) / (2 * self.count))
+
+    def band(self, probabilities, confidence=0.95):
+        half_width = self.band_half_width(confidence)
+        return ([max(probability - half_width, 0.0) for probability in probabilities],
+                [min(probability + half_width, 1.0) for probability in probabilities])
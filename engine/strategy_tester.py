@@ -1,88 +1,423 @@
+import random
+import time
+
+from engine import instrumentation
 from engine import warships as WS
-from engine.warships import ShipConfig
+from engine.analytic import exact_test, win_distribution_of
+from engine.checkpoint import (add_range, class_path, config_from_list, config_to_list, in_ranges,
+                               load_checkpoint, load_class, remove_stale_temporaries, save_checkpoint)
+from engine.corpus import open_corpus
+from engine.executors import ProcessExecutor
+from engine.instrumentation import CallCounter, Profile
+from engine.opening_book import open_book
+from engine.stats import Summary, PairedComparison, HistogramStats
+from engine.traces import TraceWriter, traced_class
+from engine.warships import ShipConfig, Grid
 from strategies.strategy import Strategy
-from multiprocessing import Pool
-from copy import deepcopy
+
+BOARD_STREAM, STRATEGY_STREAM = 0, 1
+
+
+class Chunk:
+    def __init__(self, strategies, config, grid_class, uniform_boards, seed, corpus, first_game, num_of_games,
+                 instrument=False, opening_book=None, records=False, traces=False):
+        self.strategies = strategies
+        self.config = config
+        self.grid_class = grid_class
+        self.uniform_boards = uniform_boards
+        self.seed = seed
+        self.corpus = corpus
+        self.first_game = first_game
+        self.num_of_games = num_of_games
+        self.instrument = instrument
+        self.opening_book = opening_book
+        self.records = records
+        self.traces = traces
 
 
 class Iterator:
-    def __init__(self, count, strategy, config):
+    def __init__(self, count, chunk_size, strategies, config, grid_class=Grid, uniform_boards=False, seed=None,
+                 corpus=None, done=(), instrument=False, opening_book=None, records=False, traces=False, first_game=0):
         self.counter = count
-        self.strategy = strategy
+        self.chunk_size = chunk_size
+        self.strategies = strategies
         self.config = config
+        self.grid_class = grid_class
+        self.uniform_boards = uniform_boards
+        self.seed = seed
+        self.corpus = corpus
+        self.done = done
+        self.instrument = instrument
+        self.opening_book = opening_book
+        self.records = records
+        self.traces = traces
+        self.first_game = first_game
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        self.counter -= 1
-        if self.counter >= 0:
-            return self.strategy(), deepcopy(self.config)
-        else:
-            raise StopIteration
+        while self.counter > 0:
+            games = min(self.counter, self.chunk_size)
+            self.counter -= games
+            first_game = self.first_game
+            self.first_game += games
+            if in_ranges(self.done, first_game):
+                continue
+            return Chunk(self.strategies, self.config, self.grid_class, self.uniform_boards, self.seed,
+                         self.corpus, first_game, games, self.instrument, self.opening_book, self.records,
+                         self.traces)
+        raise StopIteration
+
+
+def wins_to_cumulative_probability(wins, num_of_games):
+    probability = []
+    current_probability = 0
+    for item in wins:
+        if item != 0:
+            current_probability += item / num_of_games
+        probability.append(current_probability)
+    return probability
 
 
-def worker1(params):
-    strategy, config = params
-    grid = WS.gen_rand_grid(config)
+def blank_wins(config: ShipConfig):
+    # wins[x] counts the games won in x moves, from 0 up to every cell of the board.
+    return [0 for i in range(config.width * config.height + 1)]
 
+
+def game_seed(seed, game, stream):
+    # Every game has its own board and strategy stream, so seeded results don't depend on how games are
+    # split into chunks or between workers.
+    return (seed << 64) | (game << 1) | stream
+
+
+def play_game(strategy, grid):
     while not grid.is_won():
         strategy.run(grid)
-
     return grid.checked_cells
 
 
+def play_chunk(chunk: Chunk):
+    # One instance of every strategy and one config serve the whole chunk; every strategy plays every board
+    # of the chunk, and only the histograms and the paired differences against the first strategy go back.
+    # An instrumented chunk also sends back its Profile, otherwise None, and a chunk with records the (game,
+    # moves, seconds) of every game of the first strategy, otherwise None. A chunk with traces also sends back
+    # the packed traces (see engine/traces.py) of the games of the first strategy, otherwise None.
+    if not chunk.instrument:
+        return play_games(chunk)
+
+    profile = Profile()
+    start = time.perf_counter()
+    counters = [CallCounter(profile, chunk.grid_class, "check", "Grid.check"),
+                CallCounter(profile, chunk.grid_class, "is_checked", "Grid.is_checked"),
+                CallCounter(profile, chunk.grid_class, "check_code", "Grid.check_code"),
+                CallCounter(profile, chunk.grid_class, "check_many", "Grid.check_many"),
+                CallCounter(profile, WS.CheckResult, "__init__", "CheckResult")]
+    instrumentation.active = profile
+    try:
+        result = play_games(chunk, profile)
+    finally:
+        instrumentation.active = None
+        for counter in counters:
+            counter.restore()
+    profile.add_time("chunk", time.perf_counter() - start)
+    # Wall clock time, so that the tester can tell how long the result took to reach it.
+    profile.finished = time.time()
+    return result
+
+
+def play_games(chunk: Chunk, profile=None):
+    strategies = [strategy_class() for strategy_class in chunk.strategies]
+    corpus = open_corpus(chunk.corpus) if chunk.corpus is not None else None
+    if chunk.opening_book is not None:
+        # Read-only and shared by every strategy with a `book` in this process.
+        for strategy in strategies:
+            if hasattr(strategy, "book"):
+                strategy.book = open_book(chunk.opening_book)
+    wins = [blank_wins(corpus.config if corpus is not None else chunk.config) for strategy in strategies]
+    differences = [Summary() for strategy in strategies[1:]]
+    board_rng = random.Random() if chunk.seed is not None else random
+    if chunk.seed is not None:
+        # Seeded games leave the `random` module, and so the caller's random state, alone.
+        strategy_rng = random.Random()
+        for strategy in strategies:
+            strategy.rng = strategy_rng
+    records = [] if chunk.records else None
+    traces = [] if chunk.traces else None
+    traced_grid_class = traced_class(chunk.grid_class) if traces is not None else None
+
+    for game in range(chunk.first_game, chunk.first_game + chunk.num_of_games):
+        moves = []
+        for i, strategy in enumerate(strategies):
+            grid_class = traced_grid_class if traces is not None and i == 0 else chunk.grid_class
+            if chunk.seed is not None:
+                board_rng.seed(game_seed(chunk.seed, game, BOARD_STREAM))
+                strategy_rng.seed(game_seed(chunk.seed, game, STRATEGY_STREAM))
+            if profile is not None:
+                start = time.perf_counter()
+            if corpus is not None:
+                grid = corpus.grid(game, grid_class)
+            else:
+                grid = WS.gen_rand_grid(chunk.config, grid_class, chunk.uniform_boards, board_rng)
+            if profile is None and records is None:
+                moves.append(play_game(strategy, grid))
+                if grid_class is traced_grid_class:
+                    traces.append(grid.trace(game))
+                continue
+            board_ready = time.perf_counter()
+            moves.append(play_game(strategy, grid))
+            played = time.perf_counter()
+            if records is not None and len(moves) == 1:
+                records.append((game, moves[0], played - board_ready))
+            if grid_class is traced_grid_class:
+                traces.append(grid.trace(game))
+            if profile is not None:
+                profile.add_time("board", board_ready - start)
+                profile.add_time("strategy", played - board_ready)
+                profile.count("games")
+                if hasattr(strategy, "dont_check"):
+                    profile.observe("dont_check size", len(strategy.dont_check))
+        for strategy_wins, strategy_moves in zip(wins, moves):
+            strategy_wins[strategy_moves] += 1
+        for summary, strategy_moves in zip(differences, moves[1:]):
+            summary.add(strategy_moves - moves[0])
+
+    return chunk.first_game, wins, differences, profile, records, b"".join(traces) if traces is not None else None
+
+
 class StrategyTester:
-    def __init__(self, workers=1, config=ShipConfig("polish")):
-        self.workers = workers
+    def __init__(self, workers=1, config=ShipConfig("polish"), grid_class=Grid, uniform_boards=False,
+                 chunk_size=None, seed=None, corpus=None, instrument=False, opening_book=None, analytic=True,
+                 executor=None, traces=None):
+        # Without an executor every run starts its own pool of `workers` processes; with one (see
+        # engine/executors.py) the runs share it and `workers` is the executor's.
+        self.executor = executor
+        self.workers = executor.workers if executor is not None else workers
         self.config = config
+        self.grid_class = grid_class
+        self.uniform_boards = uniform_boards
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.corpus = corpus
+        self.instrument = instrument
+        self.opening_book = opening_book
+        # Strategies with a known win_distribution are computed, not simulated, unless this is False.
+        self.analytic = analytic
+        # With a filename, every run writes the board and the shots of every game of its first strategy there
+        # (see engine/traces.py), replacing the traces of the run before. Traced runs are always simulated.
+        self.traces = traces
+
+    def board_config(self):
+        # The boards of a corpus have the size the corpus was written with.
+        return open_corpus(self.corpus).config if self.corpus is not None else self.config
+
+    def chunk_size_for(self, num_of_games):
+        if self.chunk_size is not None:
+            return self.chunk_size
+        # Enough chunks to keep every worker busy until the end, but never more than 1000 games per chunk.
+        return max(1, min(1000, num_of_games // (self.workers * 8)))
+
+    def chunks(self, strategies, num_of_games, seed=None, done=(), instrument=False, records=False, first_game=0):
+        # The chunks of a run, to be played by play_chunk in any order: games first_game..first_game+num_of_games-1.
+        if self.corpus is not None and first_game + num_of_games > len(open_corpus(self.corpus)):
+            raise ValueError("Corpus {} has only {} boards!".format(self.corpus, len(open_corpus(self.corpus))))
+        return Iterator(num_of_games, self.chunk_size_for(num_of_games), [type(s) for s in strategies],
+                        self.config, self.grid_class, self.uniform_boards, seed, self.corpus, done, instrument,
+                        self.opening_book, records, self.traces is not None, first_game)
+
+    def run_chunks(self, strategies, num_of_games, seed=None, done=(), profile=None, records=False, first_game=0):
+        # Yields (games finished so far, first game, histograms, paired differences and records) of every chunk
+        # that finishes. Chunks starting inside the `done` ranges of games are skipped. With a `profile`,
+        # chunks are instrumented and their profiles merged into it. Records are None unless asked for.
+        chunks = self.chunks(strategies, num_of_games, seed, done, profile is not None, records, first_game)
+        if profile is not None and self.executor is not None and self.executor.threaded:
+            raise ValueError("Instrumented runs can't share a process between threads!")
+        if self.executor is not None:
+            executor = self.executor
+        else:
+            # Corpus boards are read, not drawn, so they need no board counts.
+            uniform = self.uniform_boards and self.corpus is None
+            executor = ProcessExecutor(self.workers, [self.board_config()], uniform)
+        trace_writer = None
+        if self.traces is not None:
+            trace_writer = TraceWriter(self.traces, class_path(type(strategies[0])), self.board_config(),
+                                       {"seed": seed, "corpus": self.corpus})
+        try:
+            last_game = first_game + num_of_games
+            j = sum(min(stop, last_game) - max(start, first_game) for start, stop in done
+                    if start < last_game and stop > first_game)
+            for first_game, chunk_wins, chunk_differences, chunk_profile, chunk_records, chunk_traces in \
+                    executor.imap_unordered(play_chunk, chunks):
+                if trace_writer is not None:
+                    trace_writer.write(chunk_traces)
+                if chunk_profile is not None:
+                    # Pickling the result in the worker, sending it and unpickling it here.
+                    profile.add_time("result transfer", time.time() - chunk_profile.finished)
+                    profile.merge(chunk_profile)
+                j += sum(chunk_wins[0])
+                yield j, first_game, chunk_wins, chunk_differences, chunk_records
+        finally:
+            if executor is not self.executor:
+                executor.close()
+            if trace_writer is not None:
+                trace_writer.close()
+
+    def exact_distribution(self, strategy: Strategy):
+        # The win distribution to compute the results of `strategy` with instead of simulating them, or None.
+        # Instrumented and traced runs are always simulated.
+        if not self.analytic or self.instrument or self.traces is not None:
+            return None
+        return win_distribution_of(type(strategy))
 
     def test_to_console(self, strategy: Strategy, num_of_games):
-        wins = [0 for i in range(101)]
-        with Pool(self.workers) as p:
-            j = 0
-            for i in p.imap_unordered(worker1, Iterator(num_of_games, type(strategy), self.config)):
-                j += 1
-                wins[i] += 1
+        distribution = self.exact_distribution(strategy)
+        if distribution is not None:
+            wins, probabilities = exact_test(distribution, self.board_config(), num_of_games)
+        else:
+            wins = blank_wins(self.board_config())
+            for j, first_game, chunk_wins, chunk_differences, records in self.run_chunks([strategy], num_of_games,
+                                                                                         self.seed):
+                wins = [a + b for a, b in zip(wins, chunk_wins[0])]
                 won_games = "Won {} game out of {} games".format(j, num_of_games)
                 percentage = "[{:.2%}]".format((j) / num_of_games)
                 numspace = 45 - (len(won_games) + len(percentage))
                 print("\r" + won_games + " " * numspace + percentage, end="")
+            probabilities = wins_to_cumulative_probability(wins, num_of_games)
+            print()
 
-        probabilities = self.__wins_to_cumulative_probability(wins, num_of_games)
-        print("\nList of wins:")
+        print("List of wins:")
         print(wins)
         print("List of cumulative probabilities of winning at some number of moves:")
         print(probabilities)
 
-    def test_to_file(self, strategy: Strategy, num_of_games, filename):
-        wins = [0 for i in range(101)]
-        with Pool(self.workers) as p:
-            j = 0
-            for i in p.imap_unordered(worker1, Iterator(num_of_games, type(strategy), self.config)):
-                j += 1
-                wins[i] += 1
+    def test_to_file(self, strategy: Strategy, num_of_games, filename, records=False, first_game=0):
+        # Writes a results file (see engine/results.py) while the run goes on: the histogram, updated after
+        # every chunk, and with `records` the moves, game and time of every game. Without a seed one is drawn,
+        # so that every record names its board. The games are always simulated. Runs of one seed on other
+        # machines start at other `first_game`s, so that merge_results can combine them.
+        from engine.results import ResultsWriter
 
-        probabilities = self.__wins_to_cumulative_probability(wins, num_of_games)
-        file = open(filename, "w")
-        file.writelines((str(wins), "\n", str(probabilities)))
-        file.close()
+        seed = self.seed if self.seed is not None else random.randrange(2 ** 32)
+        with ResultsWriter.create(filename, class_path(type(strategy)), self.board_config(),
+                                  [{"seed": seed, "corpus": self.corpus}], records) as writer:
+            for j, first_game, chunk_wins, chunk_differences, chunk_records in self.run_chunks(
+                    [strategy], num_of_games, seed, records=records, first_game=first_game):
+                writer.add_chunk(chunk_wins[0], chunk_records)
+                writer.flush()
 
     def test(self, strategy: Strategy, num_of_games):
-        wins = [0 for i in range(101)]
-        with Pool(self.workers) as p:
-            j = 0
-            for i in p.imap_unordered(worker1, Iterator(num_of_games, type(strategy), self.config)):
-                j += 1
-                wins[i] += 1
-        probabilities = self.__wins_to_cumulative_probability(wins, num_of_games)
+        # Returns (wins, probabilities), or (wins, probabilities, profile) for an instrumented tester.
+        # Instrumented and traced runs are always simulated.
+        distribution = self.exact_distribution(strategy)
+        if distribution is not None:
+            return exact_test(distribution, self.board_config(), num_of_games)
+        wins = blank_wins(self.board_config())
+        profile = Profile() if self.instrument else None
+        start = time.perf_counter()
+        for j, first_game, chunk_wins, chunk_differences, records in self.run_chunks([strategy], num_of_games,
+                                                                                     self.seed, profile=profile):
+            wins = [a + b for a, b in zip(wins, chunk_wins[0])]
+        probabilities = wins_to_cumulative_probability(wins, num_of_games)
+        if profile is not None:
+            profile.add_time("run", time.perf_counter() - start)
+            return wins, probabilities, profile
+        return wins, probabilities
+
+    def test_until(self, strategy: Strategy, max_games, mean_precision=None, band_precision=None,
+                   confidence=0.95, min_games=100):
+        # Plays until the confidence interval of the mean number of moves is at most +-mean_precision and the
+        # confidence band of the cumulative curve at most +-band_precision wide, or until max_games. Only the
+        # games 0..n-1 count: a chunk that finishes before an earlier one is held back until that one is in,
+        # so that games which happen to be quick don't bias the stop. Chunks still running when the target is
+        # reached are cancelled (see the executors for what that means) and not counted. Returns (wins,
+        # probabilities, stats); stats.count is the number of games counted.
+        wins = blank_wins(self.board_config())
+        stats = HistogramStats(wins)
+        held = {}  # wins of the chunks that finished early, by their first game
+        next_game = 0
+        results = self.run_chunks([strategy], max_games, self.seed)
+        try:
+            for j, first_game, chunk_wins, chunk_differences, records in results:
+                held[first_game] = chunk_wins[0]
+                while next_game in held:
+                    chunk = held.pop(next_game)
+                    wins = [a + b for a, b in zip(wins, chunk)]
+                    next_game += sum(chunk)
+                stats = HistogramStats(wins)
+                if stats.count < min_games:
+                    continue
+                if mean_precision is not None and stats.mean_half_width(confidence) > mean_precision:
+                    continue
+                if band_precision is not None and stats.band_half_width(confidence) > band_precision:
+                    continue
+                break
+        finally:
+            results.close()
+        probabilities = wins_to_cumulative_probability(wins, stats.count)
+        return wins, probabilities, stats
+
+    def test_with_checkpoints(self, strategy: Strategy, num_of_games, filename, interval=60):
+        # Like test, but saves the partial histogram, the seed and the finished chunks to `filename` at most
+        # every `interval` seconds and when the run ends. An interrupted run continues with resume(filename).
+        state = {
+            "strategy": class_path(type(strategy)),
+            "config": config_to_list(self.config),
+            "width": self.config.width,
+            "height": self.config.height,
+            "grid_class": class_path(self.grid_class),
+            "uniform_boards": self.uniform_boards,
+            "corpus": self.corpus,
+            "opening_book": self.opening_book,
+            "seed": self.seed if self.seed is not None else random.randrange(2 ** 32),
+            "chunk_size": self.chunk_size_for(num_of_games),
+            "num_of_games": num_of_games,
+            "done": [],
+            "wins": blank_wins(self.board_config()),
+        }
+        save_checkpoint(filename, state)
+        return self.__run_checkpointed(state, filename, interval)
+
+    @classmethod
+    def resume(cls, filename, workers=1, interval=60):
+        state = load_checkpoint(filename)
+        remove_stale_temporaries(filename)
+        config = config_from_list(state["config"], state.get("width", 10), state.get("height", 10))
+        tester = cls(workers, config, load_class(state["grid_class"]),
+                     state["uniform_boards"], state["chunk_size"], state["seed"], state["corpus"],
+                     opening_book=state.get("opening_book"))
+        return tester.__run_checkpointed(state, filename, interval)
+
+    def __run_checkpointed(self, state, filename, interval):
+        strategy = load_class(state["strategy"])()
+        wins, done = state["wins"], state["done"]
+        last_save = time.monotonic()
+        for j, first_game, chunk_wins, chunk_differences, records in self.run_chunks(
+                [strategy], state["num_of_games"], state["seed"], done):
+            wins = [a + b for a, b in zip(wins, chunk_wins[0])]
+            add_range(done, first_game, first_game + sum(chunk_wins[0]))
+            if time.monotonic() - last_save >= interval:
+                save_checkpoint(filename, dict(state, wins=wins, done=done))
+                last_save = time.monotonic()
+        save_checkpoint(filename, dict(state, wins=wins, done=done))
+        probabilities = wins_to_cumulative_probability(wins, state["num_of_games"])
         return wins, probabilities
 
-    def __wins_to_cumulative_probability(self, wins, num_of_games):
-        probability = []
-        current_probability = 0
-        for item in wins:
-            if item != 0:
-                current_probability += item / num_of_games
-            probability.append(current_probability)
-        return probability
+    def compare(self, strategies, num_of_games):
+        # Plays every strategy on the same sequence of boards. Returns the (wins, probabilities) of every
+        # strategy and a PairedComparison of every other strategy against the first one.
+        seed = self.seed if self.seed is not None else random.randrange(2 ** 32)
+        wins = [blank_wins(self.board_config()) for strategy in strategies]
+        differences = [Summary() for strategy in strategies[1:]]
+        for j, first_game, chunk_wins, chunk_differences, records in self.run_chunks(strategies, num_of_games, seed):
+            for strategy_wins, strategy_chunk_wins in zip(wins, chunk_wins):
+                for moves, games in enumerate(strategy_chunk_wins):
+                    strategy_wins[moves] += games
+            for summary, chunk_summary in zip(differences, chunk_differences):
+                summary.merge(chunk_summary)
+
+        results = [(strategy_wins, wins_to_cumulative_probability(strategy_wins, num_of_games))
+                   for strategy_wins in wins]
+        names = [type(strategy).__name__ for strategy in strategies]
+        comparisons = [PairedComparison(names[0], name, summary, wins[0], strategy_wins)
+                       for name, summary, strategy_wins in zip(names[1:], differences, wins[1:])]
+        return results, comparisons
@@ -0,0 +1,150 @@
+import itertools
+import math
+import random
+import time
+
+from engine.executors import ProcessExecutor
+from engine.stats import HistogramStats
+from engine.strategy_tester import Chunk, blank_wins, play_chunk
+from engine.warships import Grid, ShipConfig
+
+
+def parameter_grid(grid):
+    # {"name": [values...], ...} -> every combination, as a list of {"name": value, ...}
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+class Variant:
+    # Makes strategies with some attributes set, the way strategies are tuned (see MonteCarloStrategy). Unlike a
+    # subclass made on the fly, it pickles, so chunks can carry it to worker processes in place of a class.
+
+    def __init__(self, factory, params):
+        self.factory = factory
+        self.params = params
+
+    def __call__(self):
+        strategy = self.factory()
+        for name, value in self.params.items():
+            setattr(strategy, name, value)
+        return strategy
+
+    def __str__(self):
+        return ", ".join("{}={}".format(name, value) for name, value in self.params.items()) or "defaults"
+
+
+class SweepEntry:
+
+    def __init__(self, variant: Variant, config: ShipConfig):
+        self.variant = variant
+        self.wins = blank_wins(config)
+        self.games = 0
+        self.rounds = 0  # rounds it took part in
+        self.eliminated = None  # the round after which it was dropped
+
+    def stats(self):
+        return HistogramStats(self.wins)
+
+
+class SweepResults:
+    # Entries ranked: the ones that lasted longer first, and by mean number of moves among those that lasted
+    # equally long.
+
+    def __init__(self, entries, rounds, confidence, wall_time):
+        self.entries = sorted(entries, key=lambda entry: (-entry.rounds, entry.stats().mean()))
+        self.rounds = rounds
+        self.confidence = confidence
+        self.wall_time = wall_time
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def best(self) -> SweepEntry:
+        return self.entries[0]
+
+    def games(self):
+        return sum(entry.games for entry in self.entries)
+
+    def exhaustive_games(self):
+        # Games it would take to play every variant as many games as the best one got.
+        return len(self.entries) * self.best().games
+
+    def __str__(self):
+        string = "{:<5}{:<48}{:>9}{:>8}{:>8}{:>6}{:>7}\n".format(
+            "rank", "variant", "games", "mean", "+-{:.0%}".format(self.confidence), "p90", "round")
+        for rank, entry in enumerate(self.entries, 1):
+            stats = entry.stats()
+            string += "{:<5}{:<48}{:>9}{:>8.2f}{:>8.2f}{:>6}{:>7}\n".format(
+                rank, str(entry.variant)[:47], entry.games, stats.mean(), stats.mean_half_width(self.confidence),
+                stats.quantile(0.9), "-" if entry.eliminated is None else entry.eliminated)
+        string += "{} games in {} rounds, {:.0%} of an exhaustive evaluation, wall time {:.2f} s".format(
+            self.games(), self.rounds, self.games() / self.exhaustive_games(), self.wall_time)
+        return string
+
+
+class Sweep:
+    # Tunes a strategy by successive halving: every variant of the parameter grid plays a few games, the worse
+    # half (1 - 1 / eta of them) is dropped, and the survivors play more, until one is left. Each round gets
+    # an equal share of the budget (games in total over all variants), so the survivors of later rounds play
+    # many more games each. All variants play the same boards, the seeded games StrategyTester plays, and
+    # every round continues with the next games, so a variant's results don't depend on the others.
+    #
+    #     results = Sweep(4, seed=1).run(AnalyticalStrategy, {"tie_break": ["scan", "centre"],
+    #                                                         "direction_choice": ["random", "room"]}, 20000)
+
+    def __init__(self, workers=1, config=ShipConfig("polish"), grid_class=Grid, uniform_boards=False, seed=None,
+                 eta=2, chunk_size=100, confidence=0.95, executor=None):
+        self.executor = executor
+        self.workers = executor.workers if executor is not None else workers
+        self.config = config
+        self.grid_class = grid_class
+        self.uniform_boards = uniform_boards
+        self.seed = seed
+        self.eta = eta
+        self.chunk_size = chunk_size
+        self.confidence = confidence
+
+    def run(self, factory, grid, budget) -> SweepResults:
+        # `factory` makes a strategy without arguments (a strategy class, usually), and every variant sets the
+        # attributes of one combination of `grid` on the strategies it makes.
+        start = time.perf_counter()
+        seed = self.seed if self.seed is not None else random.randrange(2 ** 32)
+        entries = [SweepEntry(Variant(factory, params), self.config) for params in parameter_grid(grid)]
+        rounds = max(1, math.ceil(math.log(len(entries), self.eta) - 1e-9))
+        survivors = entries
+        next_game = 0
+        budget_left = budget
+        executor = self.executor
+        if executor is None:
+            executor = ProcessExecutor(self.workers, [self.config], self.uniform_boards)
+        try:
+            for round_number in range(1, rounds + 1):
+                num_of_games = max(1, budget_left // ((rounds - round_number + 1) * len(survivors)))
+                self.__play(executor, survivors, seed, next_game, num_of_games)
+                next_game += num_of_games
+                budget_left -= num_of_games * len(survivors)
+                if round_number == rounds:
+                    break
+                survivors = sorted(survivors, key=lambda entry: entry.stats().mean())
+                kept = max(1, math.ceil(len(survivors) / self.eta))
+                for entry in survivors[kept:]:
+                    entry.eliminated = round_number
+                survivors = survivors[:kept]
+        finally:
+            if executor is not self.executor:
+                executor.close()
+        return SweepResults(entries, rounds, self.confidence, time.perf_counter() - start)
+
+    def __play(self, executor, survivors, seed, first_game, num_of_games):
+        # Games first_game.. of every survivor, all of them on the same boards.
+        variants = [entry.variant for entry in survivors]
+        stop = first_game + num_of_games
+        chunks = [Chunk(variants, self.config, self.grid_class, self.uniform_boards, seed, None, game,
+                        min(self.chunk_size, stop - game)) for game in range(first_game, stop, self.chunk_size)]
+        for chunk_first_game, chunk_wins, differences, profile, records, traces in executor.imap_unordered(
+                play_chunk, chunks):
+            for entry, wins in zip(survivors, chunk_wins):
+                entry.wins = [a + b for a, b in zip(entry.wins, wins)]
+                entry.games += sum(wins)
+        for entry in survivors:
+            entry.rounds += 1
@@ -0,0 +1,164 @@
+import queue
+import random
+import time
+
+from engine.analytic import exact_test, win_distribution_of
+from engine.executors import ProcessExecutor
+from engine.stats import HistogramStats
+from engine.strategy_tester import Chunk, blank_wins, play_chunk, wins_to_cumulative_probability
+from engine.warships import Grid, ShipConfig
+
+
+def play_timed_chunk(chunk: Chunk):
+    start = time.perf_counter()
+    result = play_chunk(chunk)
+    return result, time.perf_counter() - start
+
+
+def config_label(config: ShipConfig):
+    return "{}x{} {}".format(config.width, config.height,
+                             " ".join("{}x{}".format(ship_detail.length, ship_detail.quantity)
+                                      for ship_detail in config))
+
+
+class Entry:
+    # One strategy on one config, and what the tournament has learnt about it so far.
+
+    def __init__(self, strategy, config: ShipConfig, num_of_games):
+        self.strategy = strategy
+        self.config = config
+        self.num_of_games = num_of_games
+        self.wins = blank_wins(config)
+        self.probabilities = None
+        self.next_game = 0
+        self.games = 0
+        self.running = 0
+        self.seconds = 0.0  # worker time of the finished chunks
+        self.exact = False
+
+    def cost(self):
+        # Seconds per game, None until a chunk has finished.
+        return self.seconds / self.games if self.games else None
+
+    def games_left(self):
+        return self.num_of_games - self.next_game
+
+    def stats(self):
+        return HistogramStats(self.wins)
+
+
+class TournamentResults:
+
+    def __init__(self, entries, wall_time):
+        self.entries = entries
+        self.wall_time = wall_time
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __str__(self):
+        string = "{:<22}{:<24}{:>9}{:>8}{:>8}{:>6}{:>6}{:>6}{:>11}\n".format(
+            "strategy", "config", "games", "mean", "+-95%", "p10", "p50", "p90", "ms/game")
+        for entry in self.entries:
+            stats = entry.stats()
+            cost = "exact" if entry.exact else "{:.3f}".format(entry.cost() * 1000)
+            string += "{:<22}{:<24}{:>9}{:>8.2f}{:>8.2f}{:>6}{:>6}{:>6}{:>11}\n".format(
+                type(entry.strategy).__name__, config_label(entry.config), entry.num_of_games, stats.mean(),
+                stats.mean_half_width() if not entry.exact else 0.0, stats.quantile(0.1), stats.quantile(0.5),
+                stats.quantile(0.9), cost)
+        string += "wall time {:.2f} s".format(self.wall_time)
+        return string
+
+
+class Tournament:
+    # Plays every strategy on every config in one shared pool. The cost of a game of every entry is measured
+    # from a small probe chunk and refined as its chunks finish; chunks are then sized to take about
+    # `chunk_seconds` of worker time, and the pool is always fed from the entry with the most work left, so
+    # expensive entries start early instead of forming a tail. Near the end chunks shrink so that the workers
+    # run out of work together. Seeded games are played exactly as StrategyTester plays them, so the results
+    # don't depend on the scheduling.
+
+    def __init__(self, workers=1, grid_class=Grid, uniform_boards=False, seed=None, chunk_seconds=0.5,
+                 probe_games=4, max_chunk_size=10000, analytic=True, executor=None):
+        # Without an executor, every run starts a ProcessExecutor with the tables of its configs built.
+        self.executor = executor
+        self.workers = executor.workers if executor is not None else workers
+        self.grid_class = grid_class
+        self.uniform_boards = uniform_boards
+        self.seed = seed
+        self.chunk_seconds = chunk_seconds
+        self.probe_games = probe_games
+        self.max_chunk_size = max_chunk_size
+        self.analytic = analytic
+
+    def run(self, strategies, configs, num_of_games) -> TournamentResults:
+        start = time.perf_counter()
+        seed = self.seed if self.seed is not None else random.randrange(2 ** 32)
+        entries = [Entry(strategy, config, num_of_games) for config in configs for strategy in strategies]
+        for entry in entries:
+            distribution = win_distribution_of(type(entry.strategy)) if self.analytic else None
+            if distribution is not None:
+                entry.wins, entry.probabilities = exact_test(distribution, entry.config, num_of_games)
+                entry.next_game = entry.games = num_of_games
+                entry.exact = True
+
+        finished = queue.Queue()
+        executor = self.executor
+        if executor is None:
+            executor = ProcessExecutor(self.workers, configs, self.uniform_boards)
+        try:
+            running = 0
+            while True:
+                # One chunk more than there are workers, so that no worker waits for the next one.
+                while running < self.workers + 1:
+                    chunk = self.__next_chunk(entries, seed)
+                    if chunk is None:
+                        break
+                    entry, chunk = chunk
+                    executor.submit(play_timed_chunk, chunk, lambda result, entry=entry: finished.put((entry, result)),
+                                    finished.put)
+                    running += 1
+                if running == 0:
+                    break
+                result = finished.get()
+                if isinstance(result, BaseException):
+                    raise result
+                running -= 1
+                entry, ((first_game, chunk_wins, differences, profile, records, traces), seconds) = result
+                entry.running -= 1
+                entry.wins = [a + b for a, b in zip(entry.wins, chunk_wins[0])]
+                entry.games += sum(chunk_wins[0])
+                entry.seconds += seconds
+        finally:
+            if executor is not self.executor:
+                executor.close()
+
+        for entry in entries:
+            if not entry.exact:
+                entry.probabilities = wins_to_cumulative_probability(entry.wins, entry.num_of_games)
+        return TournamentResults(entries, time.perf_counter() - start)
+
+    def __next_chunk(self, entries, seed):
+        # An entry that hasn't been measured gets a probe chunk, and is left alone until the probe is back.
+        for entry in entries:
+            if entry.games_left() and entry.cost() is None:
+                if entry.running:
+                    continue
+                return entry, self.__chunk(entry, seed, self.probe_games)
+
+        measured = [entry for entry in entries if entry.games_left() and entry.cost() is not None]
+        if not measured:
+            return None
+        work_left = sum(entry.games_left() * entry.cost() for entry in measured)
+        entry = max(measured, key=lambda entry: entry.games_left() * entry.cost())
+        seconds = min(self.chunk_seconds, work_left / (2 * self.workers))
+        games = int(seconds / max(entry.cost(), 1e-9))
+        return entry, self.__chunk(entry, seed, max(1, min(self.max_chunk_size, games)))
+
+    def __chunk(self, entry, seed, num_of_games):
+        num_of_games = min(num_of_games, entry.games_left())
+        chunk = Chunk([type(entry.strategy)], entry.config, self.grid_class, self.uniform_boards, seed, None,
+                      entry.next_game, num_of_games)
+        entry.next_game += num_of_games
+        entry.running += 1
+        return chunk
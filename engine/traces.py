@@ -0,0 +1,254 @@
+import argparse
+import struct
+from array import array
+
+from engine.checkpoint import config_from_list, config_to_list
+from engine.fileformat import MappedFile, pack_description, pack_header, unpack_description, unpack_header
+from engine.warships import HIT, MISS, SUNK, Grid, ShipConfig, board_points
+
+# Header, JSON description, then per game: GAME, a ship code per ship (longest first), a cell per shot.
+MAGIC = b"PWTR"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBI")
+GAME = struct.Struct("<IH")  # game, moves
+
+_traced_classes = {}
+
+
+def traced_class(grid_class):
+    # A subclass of the grid class that records its ships and every shot, one append per move.
+    if grid_class not in _traced_classes:
+
+        class TracedGrid(grid_class):
+
+            def __init__(self, width=10, height=10):
+                super().__init__(width, height)
+                self.placed = []  # (length, code) of every ship
+                self.shots = array("B" if width * height <= 256 else "H")
+
+            def place_ship(self, point, direction, length):
+                super().place_ship(point, direction, length)
+                end = point.move(direction, length - 1)
+                vertical = length > 1 and direction.lower() in ("up", "down")
+                self.placed.append((length, min(point.index, end.index) * 2 + vertical))
+
+            def check_code(self, point):
+                code = super().check_code(point)
+                self.shots.append(point.index)
+                return code
+
+            def check_many(self, shots):
+                # Shot by shot, so that every one is recorded.
+                for point in shots:
+                    if self.is_won():
+                        break
+                    if not self.is_checked(point):
+                        self.check_code(point)
+                return self.checked_cells if self.is_won() else None
+
+            def trace(self, game):
+                codes = [code for length, code in sorted(self.placed, key=lambda ship: -ship[0])]
+                return (GAME.pack(game, len(self.shots)) + struct.pack("<{}H".format(len(codes)), *codes)
+                        + self.shots.tobytes())
+
+        TracedGrid.__name__ = TracedGrid.__qualname__ = "Traced" + grid_class.__name__
+        _traced_classes[grid_class] = TracedGrid
+    return _traced_classes[grid_class]
+
+
+class GameTrace:
+    # `ships`: a code per ship (top-left cell * 2, plus 1 if vertical); `shots`: the cell of every move.
+
+    def __init__(self, trace_file, game, ships, shots):
+        self.file = trace_file
+        self.game = game
+        self.ships = ships
+        self.shots = shots
+        self.moves = len(shots)
+        self.__results = None
+
+    def ship_cells(self):
+        # The cells of every ship, in config order.
+        return [self.file.cells_of(code, length) for code, length in zip(self.ships, self.file.lengths)]
+
+    def results(self):
+        # MISS, HIT or SUNK of every shot.
+        if self.__results is None:
+            size = self.file.width * self.file.height
+            ship_of = bytearray(size)  # 1 + the ship on every cell, 0 for water
+            for ship, cells in enumerate(self.ship_cells(), 1):
+                for cell in cells:
+                    ship_of[cell] = ship
+            remaining = [0] + self.file.lengths
+            checked = bytearray(size)
+            results = []
+            for cell in self.shots:
+                ship = ship_of[cell]
+                if not ship:
+                    results.append(MISS)
+                    continue
+                if not checked[cell]:
+                    checked[cell] = 1
+                    remaining[ship] -= 1
+                results.append(SUNK if remaining[ship] == 0 else HIT)
+            self.__results = results
+        return self.__results
+
+    def grid(self, moves=None, grid_class=Grid):
+        # The grid after the first `moves` shots (all of them by default); print it to see the game state.
+        width, height = self.file.width, self.file.height
+        grid = grid_class(width, height)
+        points = board_points(width, height)
+        for code, length in zip(self.ships, self.file.lengths):
+            direction = "down" if code & 1 else "right"
+            grid.place_ship(points[code >> 1], direction, length)
+        for cell in self.shots[:self.moves if moves is None else moves]:
+            grid.check_code(points[cell])
+        return grid
+
+
+class TraceFile(MappedFile):
+    # Decoded game by game as it is iterated.
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        width, height, (description_size,) = unpack_header(HEADER, self.map, MAGIC, VERSION, filename,
+                                                           "a trace file")
+        self.width, self.height = width, height
+        description = unpack_description(self.map, HEADER.size, description_size)
+        self.strategy = description["strategy"]
+        self.config = config_from_list(description["config"], width, height)
+        self.source = description["source"]
+        self.lengths = [ship_detail.length for ship_detail in self.config for i in range(ship_detail.quantity)]
+        self.ships = struct.Struct("<{}H".format(len(self.lengths)))
+        self.shot_size = 1 if width * height <= 256 else 2
+        self.start = HEADER.size + description_size
+        self.__cells = {}
+        self.__halos = {}
+
+    def cells_of(self, code, length):
+        # The cells of a ship, cached: every board reuses the same few placements.
+        cells = self.__cells.get((code, length))
+        if cells is None:
+            step = self.width if code & 1 else 1
+            cells = self.__cells[code, length] = tuple((code >> 1) + step * i for i in range(length))
+        return cells
+
+    def halo_of(self, code, length):
+        # The cells of a ship and every cell touching it.
+        halo = self.__halos.get((code, length))
+        if halo is None:
+            points = board_points(self.width, self.height)
+            halo = self.__halos[code, length] = frozenset(
+                point.index for cell in self.cells_of(code, length) for point in points[cell].halo)
+        return halo
+
+    def __iter__(self):
+        data, offset, end = self.map, self.start, len(self.map)
+        ships, shot_size = self.ships, self.shot_size
+        shot_format = "B" if shot_size == 1 else "H"
+        while offset + GAME.size <= end:
+            game, moves = GAME.unpack_from(data, offset)
+            offset += GAME.size
+            codes = ships.unpack_from(data, offset)
+            offset += ships.size
+            shots = array(shot_format, data[offset:offset + moves * shot_size])
+            offset += moves * shot_size
+            yield GameTrace(self, game, codes, shots)
+
+    def select(self, predicate):
+        return (trace for trace in self if predicate(trace))
+
+    def game(self, game):
+        for trace in self:
+            if trace.game == game:
+                return trace
+        raise KeyError(game)
+
+
+class TraceWriter:
+
+    def __init__(self, filename, strategy, config: ShipConfig, source):
+        description = pack_description({"strategy": strategy, "config": config_to_list(config), "source": source})
+        self.file = open(filename, "wb")
+        self.file.write(pack_header(HEADER, MAGIC, VERSION, config, len(description)))
+        self.file.write(description)
+
+    def write(self, traces):
+        # Packed traces, as TracedGrid.trace returns them.
+        self.file.write(traces)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+# Metrics to re-score games by, all functions of a GameTrace.
+
+def first_hit(trace: GameTrace):
+    # Moves until the first hit.
+    for move, result in enumerate(trace.results(), 1):
+        if result != MISS:
+            return move
+    return trace.moves
+
+
+def repeated_shots(trace: GameTrace):
+    # Moves at cells that were already checked.
+    return trace.moves - len(set(trace.shots))
+
+
+def shots_next_to_sunk(trace: GameTrace):
+    # Moves at cells known to be water because they touch a ship that was already sunk.
+    results = trace.results()
+    water = set()
+    wasted = 0
+    ships = {cell: ship for ship in zip(trace.ships, trace.file.lengths) for cell in trace.file.cells_of(*ship)}
+    for cell, result in zip(trace.shots, results):
+        if cell in water:
+            wasted += 1
+        if result == SUNK:
+            water.update(trace.file.halo_of(*ships[cell]))
+    return wasted
+
+
+METRICS = {"moves": lambda trace: trace.moves, "first_hit": first_hit, "repeated_shots": repeated_shots,
+           "shots_next_to_sunk": shots_next_to_sunk}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded games.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    show_parser = commands.add_parser("show", help="print games of a trace file")
+    show_parser.add_argument("filename")
+    show_parser.add_argument("--min-moves", type=int, default=0)
+    show_parser.add_argument("--max-moves", type=int)
+    show_parser.add_argument("--limit", type=int, default=1)
+    show_parser.add_argument("--at", type=int, help="show the grid after this many moves (default: the end)")
+    score_parser = commands.add_parser("score", help="mean of metrics over the games of a trace file")
+    score_parser.add_argument("filename")
+    score_parser.add_argument("metrics", nargs="+", choices=sorted(METRICS))
+    args = parser.parse_args()
+
+    with TraceFile(args.filename) as traces:
+        if args.command == "show":
+            selected = traces.select(lambda trace: trace.moves >= args.min_moves
+                                     and (args.max_moves is None or trace.moves <= args.max_moves))
+            for i, trace in zip(range(args.limit), selected):
+                print("game {}, {} moves".format(trace.game, trace.moves))
+                print(trace.grid(args.at))
+        else:
+            totals = {name: 0 for name in args.metrics}
+            games = 0
+            for trace in traces:
+                games += 1
+                for name in args.metrics:
+                    totals[name] += METRICS[name](trace)
+            for name in args.metrics:
+                print("{:<24}{:>12.3f}".format(name, totals[name] / games if games else 0))
@@ -2,12 +2,22 @@ import random
 from typing import Iterable, List
 
 
+# Result codes of Grid.check_code; CheckResult wraps them for callers that test `"HIT" in result`.
+MISS, HIT, SUNK = 0, 1, 2
+RESULT_NAMES = ["MISS", "HIT", "SUNK"]
+RESULT_CODES = {"MISS": MISS, "HIT": HIT, "SUNK": SUNK}
+
+
 class CheckResult:
 
     def __init__(self, state, length=0):
         self.state = state
         self.length = length
 
+    @property
+    def code(self):
+        return RESULT_CODES[self.state]
+
     def __contains__(self, item):
         return self.state == item
 
@@ -19,48 +29,87 @@ class CheckResult:
 
 
 class GridPoint:
+    # Points are interned: there is one immutable point per cell of every board size, so GridPoint(x, y)
+    # always returns the same object and points compare and hash by identity. Every point knows its
+    # neighbours, the rays of cells from it to the edge of the board and its 3x3 halo.
+    __slots__ = ("x", "y", "width", "height", "index", "neighbours", "rays", "halo")
     directions = ["left", "right", "up", "down"]
+    deltas = {"left": (-1, 0), "right": (1, 0), "up": (0, -1), "down": (0, 1)}
 
-    def __init__(self, x, y):
-        if x < 0 or x > 9:
-            raise ValueError("X must be in range 0-9!")
-        if y < 0 or y > 9:
-            raise ValueError("Y must be in range 0-9!")
-        self.x, self.y = x, y
+    def __new__(cls, x, y, width=10, height=10):
+        if x < 0 or x >= width:
+            raise ValueError("X must be in range 0-{}!".format(width - 1))
+        if y < 0 or y >= height:
+            raise ValueError("Y must be in range 0-{}!".format(height - 1))
+        points = _points.get((width, height))
+        if points is None:
+            points = _gen_points(cls, width, height)
+        return points[y * width + x]
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GridPoint is immutable!")
+
+    def __reduce__(self):
+        return GridPoint, (self.x, self.y, self.width, self.height)
 
     def move(self, direction: str, times=1):
-        direction = direction.lower()
-        x_delta = 0
-        y_delta = 0
-        for i in range(times):
-            if direction == "left":
-                x_delta -= 1
-            elif direction == "right":
-                x_delta += 1
-            elif direction == "up":
-                y_delta -= 1
-            elif direction == "down":
-                y_delta += 1
-            else:
+        ray = self.rays.get(direction)
+        if ray is None:
+            direction = direction.lower()
+            if direction not in self.rays:
                 raise ValueError("Direction must be 'up', 'down', 'left' or 'right'!")
-        return GridPoint(self.x + x_delta, self.y + y_delta)
+            ray = self.rays[direction]
+        if times <= 0:
+            return self
+        if times > len(ray):
+            x_delta, y_delta = self.deltas[direction]
+            # Raises the same ValueError as GridPoint() off the board.
+            GridPoint(self.x + x_delta * times, self.y + y_delta * times, self.width, self.height)
+        return ray[times - 1]
 
     def is_on(self, direction, other):
-        try:
-            ret = other.move(direction) == self
-        except ValueError:
-            return False
-        return ret
-
-    def __eq__(self, other):
-        if self.x == other.x and self.y == other.y:
-            return True
-        return False
+        return other.neighbours.get(direction.lower()) is self
 
     def __str__(self):
         return "x: {} y: {}".format(self.x, self.y)
 
 
+_points = {}
+
+
+def _gen_points(cls, width, height):
+    points = []
+    for index in range(width * height):
+        point = object.__new__(cls)
+        for name, value in (("x", index % width), ("y", index // width), ("width", width), ("height", height),
+                            ("index", index)):
+            object.__setattr__(point, name, value)
+        points.append(point)
+
+    def at(x, y):
+        if 0 <= x < width and 0 <= y < height:
+            return points[y * width + x]
+        return None
+
+    for point in points:
+        rays = {}
+        for direction, (x_delta, y_delta) in GridPoint.deltas.items():
+            ray = []
+            x, y = point.x + x_delta, point.y + y_delta
+            while at(x, y) is not None:
+                ray.append(at(x, y))
+                x, y = x + x_delta, y + y_delta
+            rays[direction] = tuple(ray)
+        halo = tuple(at(point.x + x, point.y + y) for x in (-1, 0, 1) for y in (-1, 0, 1)
+                     if at(point.x + x, point.y + y) is not None)
+        object.__setattr__(point, "rays", rays)
+        object.__setattr__(point, "neighbours", {direction: ray[0] if ray else None
+                                                 for direction, ray in rays.items()})
+        object.__setattr__(point, "halo", halo)
+    # Threads building the same size at once must all end up with one table, as points compare by identity.
+    return _points.setdefault((width, height), points)
+
+
 class Cell:
     def __init__(self, point: GridPoint):
         self.__is_ship_cell = False
@@ -137,35 +186,48 @@ class Ship:
 
 
 class Grid:
-    def __init__(self):
+    def __init__(self, width=10, height=10):
+        self.width, self.height = width, height
         self.__grid = self.generate_blank_grid()
         self.checked_cells = 0
-        self.__checked_ship_cells = 0
         self.__ships = []
-        self.ship_config = ShipConfig()
+        self.ship_config = ShipConfig(width=width, height=height)
+        # Cell y * width + x: whether it was checked and the index of the ship on it (-1 for water). Every
+        # ship has its length and the number of its cells not hit yet.
+        self.__checked = [False] * (width * height)
+        self.__ship_ids = [-1] * (width * height)
+        self.__lengths = []
+        self.__remaining = []
+        self.__cells_left = 0
 
     def generate_blank_grid(self):
-        return [[Cell(GridPoint(x, y)) for x in range(10)] for y in range(10)]
+        return [[Cell(GridPoint(x, y, self.width, self.height)) for x in range(self.width)]
+                for y in range(self.height)]
 
     def place_ship(self, point, direction, length):
         valid_coords = []
         for i in range(length):
             self.__check_ship_nearby(point)
             valid_coords.append(point)
-            point = point.move(direction)
+            if i < length - 1:
+                point = point.move(direction)
         for point in valid_coords:
             self.__cell_at(point).ship_cell(True)
+            self.__ship_ids[point.y * self.width + point.x] = len(self.__ships)
         ship = Ship([self.__cell_at(point) for point in valid_coords])
         self.__ships.append(ship)
+        self.__lengths.append(length)
+        self.__remaining.append(length)
+        self.__cells_left += length
         self.ship_config.add_ship_of_length(length)
 
     def __check_ship_nearby(self, point):
         def check_offset(point, x_offset, y_offset):
-            if point.x + x_offset < 0 or point.x + x_offset > 9:
+            if point.x + x_offset < 0 or point.x + x_offset >= self.width:
                 return
-            if point.y + y_offset < 0 or point.y + y_offset > 9:
+            if point.y + y_offset < 0 or point.y + y_offset >= self.height:
                 return
-            if self.__cell_at(GridPoint(point.x + x_offset, point.y + y_offset)).ship_cell():
+            if self.__grid[point.y + y_offset][point.x + x_offset].ship_cell():
                 raise ValueError("You can't place ship here!")
 
         offsets = [-1, 0, 1]
@@ -176,38 +238,69 @@ class Grid:
     def __cell_at(self, point):
         return self.__grid[point.y][point.x]
 
-    def check(self, point: GridPoint) -> CheckResult:
-        if self.__cell_at(point).ship_cell():
-            self.__checked_ship_cells += 1
-            for i in self.__ships:
-                if i.has_point(point):
-                    i.hit(point)
-                    if i.is_sunk():
-                        ret = CheckResult("SUNK", len(i))
-                    else:
-                        ret = CheckResult("HIT")
+    def check_code(self, point: GridPoint) -> int:
+        # Like check, but returns MISS, HIT or SUNK without building a CheckResult.
+        index = point.y * self.width + point.x
+        ship = self.__ship_ids[index]
+        if ship >= 0:
+            if self.__remaining[ship] == 0:
+                raise SunkError("This ship is already sunk!")
+            if not self.__checked[index]:
+                self.__remaining[ship] -= 1
+                self.__cells_left -= 1
+            code = SUNK if self.__remaining[ship] == 0 else HIT
         else:
-            ret = CheckResult("MISS")
-        self.__cell_at(point).checked(True)
+            code = MISS
+        if not self.__checked[index]:
+            self.__checked[index] = True
+            self.__cell_at(point).checked(True)
         self.checked_cells += 1
-        return ret
+        return code
+
+    def check(self, point: GridPoint) -> CheckResult:
+        code = self.check_code(point)
+        if code == SUNK:
+            return CheckResult("SUNK", self.length_at(point))
+        return CheckResult(RESULT_NAMES[code])
+
+    def check_many(self, shots):
+        # Fires the shots in order until the game is won and returns the number of moves it took, or None if
+        # the shots run out first. Shots at cells that are already checked are skipped without a move.
+        checked, ship_ids, remaining = self.__checked, self.__ship_ids, self.__remaining
+        for point in shots:
+            if self.__cells_left == 0:
+                break
+            index = point.y * self.width + point.x
+            if checked[index]:
+                continue
+            checked[index] = True
+            self.__grid[point.y][point.x].checked(True)
+            self.checked_cells += 1
+            ship = ship_ids[index]
+            if ship >= 0:
+                remaining[ship] -= 1
+                self.__cells_left -= 1
+        return self.checked_cells if self.__cells_left == 0 else None
+
+    def length_at(self, point: GridPoint):
+        # Length of the ship on the point, 0 for water.
+        ship = self.__ship_ids[point.y * self.width + point.x]
+        return self.__lengths[ship] if ship >= 0 else 0
 
     def is_checked(self, point):
-        return self.__cell_at(point).checked()
+        return self.__checked[point.y * self.width + point.x]
 
     def is_won(self):
-        for ship in self.__ships:
-            if not ship.is_sunk():
-                return False
-        return True
+        return self.__cells_left == 0
 
     def mark(self, point: GridPoint, marker: str):
         self.__cell_at(point).set_marker(marker)
 
     def __str__(self):
-        string = "  0 1 2 3 4 5 6 7 8 9\n"
+        label_width = len(str(self.height - 1))
+        string = header_row(self.width, label_width)
         for i, row in enumerate(self.__grid):
-            string += str(i)
+            string += str(i).rjust(label_width)
             string += " "
             for item in row:
                 string += str(item) + " "
@@ -215,6 +308,17 @@ class Grid:
         return string
 
 
+def board_points(width=10, height=10):
+    # Every point of a width x height board in cell index order, as a new list.
+    GridPoint(0, 0, width, height)
+    return list(_points[width, height])
+
+
+def header_row(width, label_width=1):
+    # Column numbers of Grid.__str__; past 10 columns only the last digit is shown to keep columns aligned.
+    return " " * (label_width + 1) + " ".join(str(x % 10) for x in range(width)) + "\n"
+
+
 class ShipConfig:
 
     class ShipDetails:
@@ -223,7 +327,8 @@ class ShipConfig:
             self.length = length
             self.quantity = quantity
 
-    def __init__(self, config=None):
+    def __init__(self, config=None, width=10, height=10):
+        self.width, self.height = width, height
         self.predefined = {"polish": [self.ShipDetails(4, 1), self.ShipDetails(3, 2),
                                       self.ShipDetails(2, 3), self.ShipDetails(1, 4)]}
 
@@ -246,39 +351,17 @@ class ShipConfig:
         self.config.append(self.ShipDetails(length, 1))
 
     def __iter__(self):
-        self.index = 0
-        self.config.sort(key=lambda ship_detail: ship_detail.length, reverse=True)
-        return self
-
-    def __next__(self):
-        try:
-            ret = self.config[self.index]
-        except IndexError:
-            raise StopIteration
-        self.index += 1
-        return ret
-
-
-def gen_rand_grid(config: ShipConfig):
-    grid = Grid()
-
-    def place_random_ship(size):  # TODO: embed mechanizm that checks if ship can be placed or not
-        ship_placed = False
-        tries_count = 0
-        while not ship_placed and tries_count < 50:
-            point = GridPoint(random.randint(0, 9), random.randint(0, 9))
-            direction = random.choice(GridPoint.directions)
-            try:
-                grid.place_ship(point, direction, size)
-                ship_placed = True
-            except ValueError:
-                pass
-            tries_count += 1
+        # Longest ships first. A fresh iterator every time, so that threads can iterate the same config at once.
+        return iter(sorted(self.config, key=lambda ship_detail: ship_detail.length, reverse=True))
+
 
-        return ship_placed
+def gen_rand_grid(config: ShipConfig, grid_class=Grid, uniform=False, rng=random):
+    from engine.board_generator import board_generator
 
-    for ship_detail in config:
-        for i in range(ship_detail.quantity):
-            place_random_ship(ship_detail.length)
+    generator = board_generator(config)
+    ships = generator.sample_uniform(rng) if uniform else generator.sample(rng)
 
+    grid = grid_class(config.width, config.height)
+    for ship in ships:
+        grid.place_ship(GridPoint(ship.x, ship.y, config.width, config.height), ship.direction, ship.length)
     return grid
@@ -1,10 +1,19 @@
-import random
-
-from engine.warships import GridPoint, Grid, CheckResult
+from engine import instrumentation
+from engine.warships import GridPoint, Grid, HIT, MISS, SUNK, board_points
+from strategies.placement_density import PlacementDensity, centre_ranks
 from strategies.strategy import Strategy
 
 
 class AnalyticalStrategy(Strategy):
+    # An OpeningBook of hunt decisions (see engine/opening_book.py), or None to compute every one of them.
+    book = None
+    # Set by subclassing, or per variant by engine.sweep: how ties between equally likely hunt cells are broken
+    # ("scan": first in column by column order, "centre": nearest to the centre of the board), and which way a
+    # ship is followed first ("random", or "room": towards the longer run of cells that may still hold it).
+    # An opening book holds decisions of the scan tie break only, so it isn't used with the other one.
+    tie_break = "scan"
+    direction_choice = "random"
+
     def run(self, grid: Grid):
         self.init_vars(grid)
 
@@ -17,10 +26,18 @@ class AnalyticalStrategy(Strategy):
 
     def init_vars(self, grid: Grid):
         self.mode = "HUNT"  # or "DESTROY", respectively
-        self.dont_check = []
+        self.dont_check = set()
         self.first_ship_point = None
         self.grid = grid
         self.alive_ships = {i.length: i.quantity for i in grid.ship_config}
+        # The density is built on the first hunt decision the book doesn't know, and catches up with the cells
+        # blocked in the meantime, so decisions found in the book cost no density updates at all.
+        self.density = None
+        self.blocked = 0  # mask of the checked and dont_check cells
+        self.pending = []  # cells blocked since the density was last brought up to date
+        self.points = board_points(grid.width, grid.height)
+        if self.book is not None and not self.book.fits(grid.width, grid.height, self.alive_ships):
+            raise ValueError("The opening book is for a different board!")
 
     def destroy(self):
         ship_points = [self.first_ship_point]
@@ -38,26 +55,20 @@ class AnalyticalStrategy(Strategy):
         self.update_dont_check_points(ship_points)
 
     def list_of_eligible_points(self, ship_points):
-        points_list = []
-        point = ship_points[0]
-        for i in GridPoint.directions:
-            try:
-                points_list.append(point.move(i))
-            except ValueError:
-                pass
-        return points_list
+        neighbours = ship_points[0].neighbours
+        return [neighbours[i] for i in GridPoint.directions if neighbours[i] is not None]
 
     def find_next_ship_point(self, possible_points, ship_points):
         while True:  # repeat until you hit ship cell
-            random_point = random.choice(possible_points)
+            random_point = self.rng.choice(possible_points)
             possible_points.remove(random_point)
             result = self.do_check(random_point)
-            if "MISS" in result:
+            if result == MISS:
                 pass
-            elif "HIT" in result:
+            elif result == HIT:
                 return random_point
-            elif "SUNK" in result:
-                self.mark_sunk(result.length)
+            elif result == SUNK:
+                self.mark_sunk(self.grid.length_at(random_point))
                 ship_points.append(random_point)
                 return None  # None means that we found all ship cells
 
@@ -73,7 +84,10 @@ class AnalyticalStrategy(Strategy):
     def find_rest_of_ship(self, directions, ship_points):
         for i in range(2):
             is_ship_cell = True
-            direction = random.choice(directions)
+            if self.direction_choice == "room":
+                direction = max(directions, key=lambda direction: self.room(direction, ship_points))
+            else:
+                direction = self.rng.choice(directions)
             directions.remove(direction)
 
             if ship_points[0].is_on(direction, ship_points[1]):
@@ -82,92 +96,92 @@ class AnalyticalStrategy(Strategy):
                 point = ship_points[1]
 
             while is_ship_cell:  # repeat until we hit non-ship cell
-                try:
-                    point = point.move(direction)
-                    result = self.do_check(point)
-                    if "MISS" in result:
-                        # that means we are returning to the starting point and trying again in other direction
-                        is_ship_cell = False
-                    elif "HIT" in result:
-                        is_ship_cell = True
-                        ship_points.append(point)
-                    elif "SUNK" in result:
-                        ship_points.append(point)
-                        self.mark_sunk(result.length)
-                        return
-                except ValueError:
+                point = point.neighbours[direction]
+                if point is None:  # edge of the board
                     break
+                result = self.do_check(point)
+                if result == MISS:
+                    # that means we are returning to the starting point and trying again in other direction
+                    is_ship_cell = False
+                elif result == HIT:
+                    is_ship_cell = True
+                    ship_points.append(point)
+                elif result == SUNK:
+                    ship_points.append(point)
+                    self.mark_sunk(self.grid.length_at(point))
+                    return
+
+    def room(self, direction, ship_points):
+        # Cells in a row past the end of the ship in that direction that aren't checked or known to be water.
+        point = ship_points[0] if ship_points[0].is_on(direction, ship_points[1]) else ship_points[1]
+        room = 0
+        for point in point.rays[direction]:
+            if self.grid.is_checked(point) or point in self.dont_check:
+                break
+            room += 1
+        return room
 
     def hunt(self):
         point = self.pick_most_probable_hunt_point()
         result_of_check = self.do_check(point)
-        if "MISS" in result_of_check:
+        if result_of_check == MISS:
             self.mode = "HUNT"
-        elif "HIT" in result_of_check:
+        elif result_of_check == HIT:
             self.mode = "DESTROY"
             self.first_ship_point = point
-        elif "SUNK" in result_of_check:
+        elif result_of_check == SUNK:
             self.update_dont_check_points([point])
             self.mode = "HUNT"
-            self.mark_sunk(result_of_check.length)
+            self.mark_sunk(self.grid.length_at(point))
 
     def pick_most_probable_hunt_point(self):
-
-        probability_grid = [[0 for x in range(10)] for y in range(10)]
-
-        def test(direction, length, x, y):
-            try:
-                GridPoint(x, y).move(direction, times=length - 1)
-            except ValueError:
-                return
-            for delta in range(length):
-                point_to_check = GridPoint(x, y).move(direction, times=delta)
-                if self.grid.is_checked(point_to_check) or point_to_check in self.dont_check:
-                    return
-            for delta in range(length):  # if that position is available:
-                point_to_add = GridPoint(x, y).move(direction, times=delta)
-                probability_grid[point_to_add.y][point_to_add.x] += 1
-
-        def reduce_probability_grid():
-            max = [0, 0]
-            for x in range(10):
-                for y in range(10):
-                    if probability_grid[y][x] > probability_grid[max[0]][max[1]]:
-                        max = [y, x]
-            return GridPoint(max[1], max[0])
-
-        for length in self.alive_ships:
-            if self.alive_ships[length] != 0:
-                for direction in ["right", "down"]:
-                    for x in range(10):
-                        for y in range(10):
-                            point_to_check = GridPoint(x, y)
-                            if self.grid.is_checked(point_to_check) or point_to_check in self.dont_check:
-                                continue
-                            test(direction, length, x, y)
-
-        return reduce_probability_grid()
+        book = self.book
+        if book is None or self.tie_break != "scan" or (book.depth is not None
+                                                        and self.grid.checked_cells >= book.depth):
+            return self.density_point()
+        key = book.key(self.blocked, self.alive_ships)
+        cell = book.get(key)
+        if cell is not None:
+            instrumentation.count("opening book hits")
+            return self.points[cell]
+        instrumentation.count("opening book misses")
+        point = self.density_point()
+        book.put(key, point.index)
+        return point
+
+    def density_point(self):
+        if self.density is None:
+            width, height = self.grid.width, self.grid.height
+            ranks = centre_ranks(width, height) if self.tie_break == "centre" else None
+            self.density = PlacementDensity(self.alive_ships, width, height, ranks)
+        density = self.density
+        for point in self.pending:
+            density.block(point)
+        self.pending = []
+        for length, quantity in self.alive_ships.items():
+            density.set_active(length, quantity != 0)
+        return density.best_point()
+
+    def block(self, point: GridPoint):
+        self.blocked |= 1 << point.index
+        self.pending.append(point)
 
     def update_dont_check_points(self, points_to_check_around):
-        offsets = [-1, 0, 1]
         for i in points_to_check_around:
-            for x in offsets:
-                for y in offsets:
-                    try:
-                        point = GridPoint(i.x + x, i.y + y)
-                        if not self.grid.is_checked(point) and point not in self.dont_check:
-                            self.dont_check.append(point)
-                            self.grid.mark(point, "*")
-                            # print(self.grid)
-                    except:
-                        pass
-
-    def do_check(self, point: GridPoint) -> CheckResult:
+            for point in i.halo:
+                if not self.grid.is_checked(point) and point not in self.dont_check:
+                    self.dont_check.add(point)
+                    self.block(point)
+                    self.grid.mark(point, "*")
+                    # print(self.grid)
+
+    def do_check(self, point: GridPoint) -> int:
         if (not self.grid.is_checked(point)) and (point not in self.dont_check):
-            check_result = self.grid.check(point)
+            check_result = self.grid.check_code(point)
+            self.block(point)
             # print(self.grid)
             return check_result
-        return CheckResult("MISS")
+        return MISS
 
     def mark_sunk(self, length):
         self.alive_ships[length] -= 1
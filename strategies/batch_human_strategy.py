@@ -0,0 +1,110 @@
+import numpy as np
+
+from engine.batch import BatchGrid, OPPOSITE, HIT, MISS, SUNK, dilate
+from strategies.batch_strategy import BatchStrategy
+
+HUNT, PROBE, WALK = 0, 1, 2
+
+
+class BatchHumanStrategy(BatchStrategy):
+    # HumanStrategy, one move per game per step. Draws that HumanStrategy throws away without spending a move
+    # (already checked cells, cells around sunk ships, the board edge) are resolved inside the same step:
+    # PROBE looks for the second cell of a ship next to the first hit, WALK follows the ship in one direction
+    # and then turns around.
+
+    def __init__(self, games: BatchGrid, rng):
+        super().__init__(games, rng)
+        n = len(games)
+        self.mode = np.full(n, HUNT, dtype=np.int64)
+        self.dont_check = np.zeros((n, games.cells), dtype=bool)
+        self.ship_points = np.zeros((n, games.cells), dtype=bool)
+        self.first_ship_point = np.zeros(n, dtype=np.int64)
+        self.second_ship_point = np.zeros(n, dtype=np.int64)
+        self.tried = np.zeros((n, 4), dtype=bool)
+        self.direction = np.zeros(n, dtype=np.int64)
+        self.point = np.zeros(n, dtype=np.int64)
+        self.second_pass = np.zeros(n, dtype=bool)
+
+    def eligible(self, games):
+        return ~self.games.checked[games] & ~self.dont_check[games]
+
+    def start_point(self, games):
+        # The rest of the ship is searched from whichever of its first two points lies further that way.
+        first, second = self.first_ship_point[games], self.second_ship_point[games]
+        return np.where(self.games.neighbours[second, self.direction[games]] == first, first, second)
+
+    def turn_around(self, games):
+        self.second_pass[games] = True
+        self.direction[games] = OPPOSITE[self.direction[games]]
+        self.point[games] = self.start_point(games)
+
+    def finish_ship(self, games):
+        halo = dilate(self.ship_points[games], self.games.width, self.games.height) & ~self.games.checked[games]
+        self.dont_check[games] |= halo
+        self.ship_points[games] = False
+        self.mode[games] = HUNT
+
+    def next_walk_points(self, games):
+        points = self.games.neighbours[self.point[games], self.direction[games]]
+        blocked = (points < 0) | ~self.eligible(games)[np.arange(len(games)), points]
+        return points, blocked
+
+    def pick(self):
+        cells = np.zeros(len(self.games), dtype=np.int64)
+
+        walk = np.flatnonzero(self.mode == WALK)
+        points, blocked = self.next_walk_points(walk)
+        self.turn_around(walk[blocked & ~self.second_pass[walk]])
+        points, blocked = self.next_walk_points(walk)
+        self.finish_ship(walk[blocked])
+        cells[walk[~blocked]] = points[~blocked]
+
+        probe = np.flatnonzero(self.mode == PROBE)
+        candidates = self.games.neighbours[self.first_ship_point[probe]]
+        valid = (candidates >= 0) & ~self.tried[probe]
+        valid &= np.take_along_axis(self.eligible(probe), np.maximum(candidates, 0), axis=1)
+        choice = np.argmax(np.where(valid, self.rng.random(valid.shape), -1), axis=1)
+        found = valid.any(axis=1)
+        self.finish_ship(probe[~found])
+        probe, choice = probe[found], choice[found]
+        self.tried[probe, choice] = True
+        self.direction[probe] = choice
+        cells[probe] = candidates[found, choice]
+
+        hunt = np.flatnonzero(self.mode == HUNT)
+        eligible = self.eligible(hunt)
+        cells[hunt] = np.argmax(np.where(eligible, self.rng.random(eligible.shape), -1), axis=1)
+        return cells
+
+    def observe(self, cells, results):
+        games = np.arange(len(cells))
+        hit = results != MISS
+        self.ship_points[games[hit], cells[hit]] = True
+
+        hunt_hit = games[(self.mode == HUNT) & (results == HIT)]
+        probe_hit = games[(self.mode == PROBE) & (results == HIT)]
+        walk_hit = games[(self.mode == WALK) & (results == HIT)]
+        walk_miss = games[(self.mode == WALK) & (results == MISS)]
+
+        self.mode[hunt_hit] = PROBE
+        self.first_ship_point[hunt_hit] = cells[hunt_hit]
+        self.tried[hunt_hit] = False
+
+        # The ship lies along the axis of the probe that hit; pick one of its two directions at random.
+        self.mode[probe_hit] = WALK
+        self.second_ship_point[probe_hit] = cells[probe_hit]
+        self.direction[probe_hit] = self.direction[probe_hit] // 2 * 2 + self.rng.integers(0, 2, len(probe_hit))
+        self.second_pass[probe_hit] = False
+        self.point[probe_hit] = self.start_point(probe_hit)
+
+        self.point[walk_hit] = cells[walk_hit]
+        second_pass = self.second_pass[walk_miss]
+        self.turn_around(walk_miss[~second_pass])
+        self.finish_ship(walk_miss[second_pass])
+
+        self.finish_ship(games[results == SUNK])
+
+    def keep(self, mask):
+        for name in ("mode", "dont_check", "ship_points", "first_ship_point", "second_ship_point", "tried",
+                     "direction", "point", "second_pass"):
+            setattr(self, name, getattr(self, name)[mask])
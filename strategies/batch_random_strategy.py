@@ -0,0 +1,24 @@
+import numpy as np
+
+from engine.analytic import random_win_probabilities
+from engine.batch import BatchGrid
+from strategies.batch_strategy import BatchStrategy
+
+
+class BatchRandomStrategy(BatchStrategy):
+    win_distribution = staticmethod(random_win_probabilities)
+
+    def __init__(self, games: BatchGrid, rng):
+        super().__init__(games, rng)
+        # RandomStrategy retries until it draws an unchecked cell, which is the same as walking a random
+        # permutation of the board. All games in a batch have made the same number of moves.
+        self.order = np.argsort(rng.random((len(games), games.cells)), axis=1)
+        self.move = 0
+
+    def pick(self):
+        cells = self.order[:, self.move]
+        self.move += 1
+        return cells
+
+    def keep(self, mask):
+        self.order = self.order[mask]
@@ -0,0 +1,19 @@
+from engine.batch import BatchGrid
+
+
+class BatchStrategy:
+    # See Strategy.win_distribution.
+    win_distribution = None
+
+    def __init__(self, games: BatchGrid, rng):
+        self.games = games
+        self.rng = rng
+
+    def pick(self):
+        raise NotImplementedError
+
+    def observe(self, cells, results):
+        pass
+
+    def keep(self, mask):
+        pass
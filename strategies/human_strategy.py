@@ -1,6 +1,4 @@
-import random
-
-from engine.warships import GridPoint, Grid, CheckResult
+from engine.warships import GridPoint, Grid, HIT, MISS, SUNK
 from strategies.strategy import Strategy
 
 
@@ -18,7 +16,7 @@ class HumanStrategy(Strategy):
 
     def init_vars(self, grid: Grid):
         self.mode = "HUNT" # or "DESTROY", respectively
-        self.dont_check = []
+        self.dont_check = set()
         self.first_ship_point = None
         self.grid = grid
 
@@ -38,25 +36,19 @@ class HumanStrategy(Strategy):
         self.update_dont_check_points(ship_points)
 
     def list_of_eligible_points(self, ship_points):
-        points_list = []
-        point = ship_points[0]
-        for i in GridPoint.directions:
-            try:
-                points_list.append(point.move(i))
-            except ValueError:
-                pass
-        return points_list
+        neighbours = ship_points[0].neighbours
+        return [neighbours[i] for i in GridPoint.directions if neighbours[i] is not None]
 
     def find_next_ship_point(self, possible_points, ship_points):
         while True:  # repeat until you hit ship cell
-            random_point = random.choice(possible_points)
+            random_point = self.rng.choice(possible_points)
             possible_points.remove(random_point)
             result = self.do_check(random_point)
-            if "MISS" in result:
+            if result == MISS:
                 pass
-            elif "HIT" in result:
+            elif result == HIT:
                 return random_point
-            elif "SUNK" in result:
+            elif result == SUNK:
                 ship_points.append(random_point)
                 return None  # None means that we found all ship cells
 
@@ -72,7 +64,7 @@ class HumanStrategy(Strategy):
     def find_rest_of_ship(self, directions, ship_points):
         for i in range(2):
             is_ship_cell = True
-            direction = random.choice(directions)
+            direction = self.rng.choice(directions)
             directions.remove(direction)
 
             if ship_points[0].is_on(direction, ship_points[1]):
@@ -81,52 +73,46 @@ class HumanStrategy(Strategy):
                 point = ship_points[1]
 
             while is_ship_cell:  # repeat until we hit non-ship cell
-                try:
-                    point = point.move(direction)
-                    result = self.do_check(point)
-                    if "MISS" in result:
-                        # that means we are returning to the starting point and trying again in other direction
-                        is_ship_cell = False
-                    elif "HIT" in result:
-                        is_ship_cell = True
-                        ship_points.append(point)
-                    elif "SUNK" in result:
-                        ship_points.append(point)
-                        return
-                except ValueError:
+                point = point.neighbours[direction]
+                if point is None:  # edge of the board
                     break
+                result = self.do_check(point)
+                if result == MISS:
+                    # that means we are returning to the starting point and trying again in other direction
+                    is_ship_cell = False
+                elif result == HIT:
+                    is_ship_cell = True
+                    ship_points.append(point)
+                elif result == SUNK:
+                    ship_points.append(point)
+                    return
 
     def hunt(self):
-        point = GridPoint(random.randint(0, 9), random.randint(0, 9))
+        point = GridPoint(self.rng.randint(0, self.grid.width - 1), self.rng.randint(0, self.grid.height - 1),
+                          self.grid.width, self.grid.height)
         result_of_check = self.do_check(point)
-        if "MISS" in result_of_check:
+        if result_of_check == MISS:
             self.mode = "HUNT"
             self.first_ship_point = GridPoint(0, 0)
-        elif "HIT" in result_of_check:
+        elif result_of_check == HIT:
             self.mode = "DESTROY"
             self.first_ship_point = point
-        elif "SUNK" in result_of_check:
+        elif result_of_check == SUNK:
             self.update_dont_check_points([point])
             self.mode = "HUNT"
             self.first_ship_point = GridPoint(0, 0)
 
     def update_dont_check_points(self, points_to_check_around):
-        offsets = [-1, 0, 1]
         for i in points_to_check_around:
-            for x in offsets:
-                for y in offsets:
-                    try:
-                        point = GridPoint(i.x + x, i.y + y)
-                        if not self.grid.is_checked(point) and point not in self.dont_check:
-                            self.dont_check.append(point)
-                            self.grid.mark(point, "*")
-                            # print(self.grid)
-                    except:
-                        pass
-
-    def do_check(self, point: GridPoint) -> CheckResult:
+            for point in i.halo:
+                if not self.grid.is_checked(point) and point not in self.dont_check:
+                    self.dont_check.add(point)
+                    self.grid.mark(point, "*")
+                    # print(self.grid)
+
+    def do_check(self, point: GridPoint) -> int:
         if (not self.grid.is_checked(point)) and (point not in self.dont_check):
-            check_result = self.grid.check(point)
+            check_result = self.grid.check_code(point)
             # print(self.grid)
             return check_result
-        return CheckResult("MISS")
+        return MISS
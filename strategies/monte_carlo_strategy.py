@@ -0,0 +1,22 @@
+from engine.posterior import PosteriorSampler
+from engine.warships import Grid, board_points
+from strategies.strategy import Strategy
+
+
+class MonteCarloStrategy(Strategy):
+    # Fires at the unchecked cell most likely to hold a ship, estimated from boards sampled from everything
+    # observed so far (hits, misses and sunk ships). StrategyTester creates strategies without arguments, so
+    # the sampling effort is set by class attributes: subclass to change it. With `time_budget` (seconds per
+    # move) the strategy samples for a fixed time instead of a fixed number of steps, which makes seeded runs
+    # depend on the speed of the machine.
+    particles = 16
+    steps_per_move = 200
+    time_budget = None
+
+    def run(self, grid: Grid):
+        sampler = PosteriorSampler(grid.ship_config, self.rng, self.particles)
+        points = board_points(grid.width, grid.height)
+        while not grid.is_won():
+            sampler.sample(self.steps_per_move, self.time_budget)
+            cell = sampler.best_cell()
+            sampler.observe(cell, grid.check_code(points[cell]))
@@ -0,0 +1,116 @@
+from heapq import heapify, heappop, heappush
+
+from engine.warships import GridPoint, board_points
+
+_placement_cache = {}
+
+
+def scan_ranks(width, height):
+    # Position of every cell when scanning column by column. The hunt point is the first cell with the highest
+    # density in this order, which is the order AnalyticalStrategy has always used to break ties.
+    return [x * height + y for y in range(height) for x in range(width)]
+
+
+def centre_ranks(width, height):
+    # Cells nearer the centre of the board first, ties in scan order.
+    ranks = scan_ranks(width, height)
+    order = sorted(range(width * height), key=lambda cell: ((2 * (cell % width) - width + 1) ** 2
+                                                             + (2 * (cell // width) - height + 1) ** 2, ranks[cell]))
+    centre = [0] * (width * height)
+    for rank, cell in enumerate(order):
+        centre[cell] = rank
+    return centre
+
+
+def placements_for(lengths, width=10, height=10):
+    # Every way of putting a ship of each length on an empty board, as (length, cells) pairs, together with
+    # the placements covering each cell and the range of placements of each length. Ships of length 1 are
+    # deliberately listed once per direction to keep the weights AnalyticalStrategy always had.
+    key = (tuple(sorted(set(lengths))), width, height)
+    if key not in _placement_cache:
+        placements = []
+        placements_at = [[] for i in range(width * height)]
+        ranges = {}
+        for length in key[0]:
+            start = len(placements)
+            for x_delta, y_delta in ((1, 0), (0, 1)):
+                for x in range(width):
+                    for y in range(height):
+                        end_x, end_y = x + x_delta * (length - 1), y + y_delta * (length - 1)
+                        if end_x >= width or end_y >= height:
+                            continue
+                        cells = tuple((y + y_delta * i) * width + x + x_delta * i for i in range(length))
+                        for cell in cells:
+                            placements_at[cell].append(len(placements))
+                        placements.append((length, cells))
+            ranges[length] = range(start, len(placements))
+        _placement_cache[key] = placements, placements_at, ranges
+    return _placement_cache[key]
+
+
+class PlacementDensity:
+    # The density of every cell lives in a list, and the best cell in a heap of (-density, scan rank, cell)
+    # entries. Changing a density pushes a new entry and leaves the old one behind; stale entries are dropped
+    # when they reach the top, so finding the hunt point doesn't scan the whole board. Ties go to the cell of
+    # the lowest rank, scan_ranks unless other ranks are given.
+
+    def __init__(self, alive_ships, width=10, height=10, ranks=None):
+        self.width, self.height = width, height
+        self.placements, self.placements_at, self.ranges = placements_for(alive_ships.keys(), width, height)
+        self.ranks = ranks if ranks is not None else scan_ranks(width, height)
+        self.points = board_points(width, height)
+        self.free = [True] * len(self.placements)
+        self.blocked = [False] * (width * height)
+        self.active = {length: False for length in alive_ships}
+        self.density = [0] * (width * height)
+        for length, quantity in alive_ships.items():
+            if quantity != 0:
+                self.active[length] = True
+                self.__add(length, 1)
+        self.heap = [(-density, self.ranks[cell], cell) for cell, density in enumerate(self.density)]
+        heapify(self.heap)
+
+    def block(self, point: GridPoint):
+        index = point.index
+        if self.blocked[index]:
+            return
+        self.blocked[index] = True
+        density = self.density
+        changed = set()
+        for placement in self.placements_at[index]:
+            if self.free[placement]:
+                self.free[placement] = False
+                length, cells = self.placements[placement]
+                if self.active[length]:
+                    for cell in cells:
+                        density[cell] -= 1
+                    changed.update(cells)
+        self.__push(changed)
+
+    def set_active(self, length, active):
+        if self.active[length] == active:
+            return
+        self.active[length] = active
+        self.__push(self.__add(length, 1 if active else -1))
+
+    def __add(self, length, delta):
+        # Adds delta to the density of every cell of the free placements of the given length.
+        density = self.density
+        changed = set()
+        for index in self.ranges[length]:
+            if self.free[index]:
+                cells = self.placements[index][1]
+                for cell in cells:
+                    density[cell] += delta
+                changed.update(cells)
+        return changed
+
+    def __push(self, cells):
+        for cell in cells:
+            heappush(self.heap, (-self.density[cell], self.ranks[cell], cell))
+
+    def best_point(self) -> GridPoint:
+        heap = self.heap
+        while -heap[0][0] != self.density[heap[0][2]]:
+            heappop(heap)
+        return self.points[heap[0][2]]
@@ -1,13 +1,14 @@
-import random
-
-from engine.warships import GridPoint
+from engine.analytic import random_win_probabilities
+from engine.warships import board_points
 from strategies.strategy import Strategy
 
 
 class RandomStrategy(Strategy):
+    win_distribution = staticmethod(random_win_probabilities)
 
     def run(self, grid):
-        while not grid.is_won():
-            coords = GridPoint(random.randint(0, 9), random.randint(0, 9))
-            if not grid.is_checked(coords):
-                grid.check(coords)
+        # Drawing random cells until an unchecked one comes up is the same as firing at a random permutation
+        # of the board, which check_many does in one call.
+        shots = board_points(grid.width, grid.height)
+        self.rng.shuffle(shots)
+        grid.check_many(shots)
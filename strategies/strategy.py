@@ -1,6 +1,16 @@
+import random
+
 from engine.warships import Grid
 
 
 class Strategy:
+    # Where the strategy draws its random choices from: the `random` module, unless a tester gives it its own
+    # random.Random to seed for every game.
+    rng = random
+    # Strategies whose number of moves has a known distribution set this to a function of the ShipConfig
+    # returning the probability of winning in every number of moves, and testers compute their results
+    # instead of simulating them (see engine/analytic.py).
+    win_distribution = None
+
     def run(self, grid: Grid):
         raise NotImplementedError
\ No newline at end of file
@@ -0,0 +1,43 @@
+import unittest
+
+from engine.analytic import exact_test, random_win_probabilities, win_distribution_of
+from engine.strategy_tester import StrategyTester
+from engine.warships import ShipConfig
+from strategies.random_strategy import RandomStrategy
+
+
+class ShuffledTwiceStrategy(RandomStrategy):
+    # Plays like RandomStrategy, but doesn't say so.
+
+    def run(self, grid):
+        self.rng.random()
+        super().run(grid)
+
+
+class DeclaredStrategy(ShuffledTwiceStrategy):
+    win_distribution = staticmethod(random_win_probabilities)
+
+
+class RoutingTest(unittest.TestCase):
+
+    def test_overriding_run_drops_the_distribution(self):
+        self.assertIs(win_distribution_of(RandomStrategy), random_win_probabilities)
+        self.assertIsNone(win_distribution_of(ShuffledTwiceStrategy))
+        self.assertIs(win_distribution_of(DeclaredStrategy), random_win_probabilities)
+
+    def test_tester_routes_like_the_helper(self):
+        tester = StrategyTester(seed=1)
+        self.assertIsNotNone(tester.exact_distribution(RandomStrategy()))
+        self.assertIsNone(tester.exact_distribution(ShuffledTwiceStrategy()))
+        self.assertIsNone(StrategyTester(seed=1, instrument=True).exact_distribution(RandomStrategy()))
+        self.assertIsNone(StrategyTester(seed=1, analytic=False).exact_distribution(RandomStrategy()))
+
+    def test_exact_wins_are_whole_games(self):
+        for num_of_games in (1, 7, 1000, 12345):
+            wins, probabilities = exact_test(random_win_probabilities, ShipConfig("polish"), num_of_games)
+            self.assertTrue(all(isinstance(won, int) for won in wins))
+            self.assertEqual(sum(wins), num_of_games)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from engine.checkpoint import load_checkpoint
+from engine.executors import SerialExecutor
+from engine.strategy_tester import StrategyTester
+from strategies.human_strategy import HumanStrategy
+
+
+class Interrupted(Exception):
+    pass
+
+
+class InterruptedExecutor(SerialExecutor):
+    # Stops the run after `chunks` chunks, as a crash would.
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def imap_unordered(self, function, iterable):
+        for played, item in enumerate(iterable):
+            if played == self.chunks:
+                raise Interrupted()
+            yield function(item)
+
+
+class ResumeTest(unittest.TestCase):
+
+    def test_resumed_run_equals_uninterrupted_run(self):
+        expected = StrategyTester(seed=1, chunk_size=10, executor=SerialExecutor()).test(HumanStrategy(), 100)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "run.json")
+            tester = StrategyTester(seed=1, chunk_size=10, executor=InterruptedExecutor(4))
+            with self.assertRaises(Interrupted):
+                tester.test_with_checkpoints(HumanStrategy(), 100, filename, interval=0)
+            state = load_checkpoint(filename)
+            self.assertEqual(state["done"], [[0, 40]])
+            self.assertEqual(sum(state["wins"]), 40)
+            self.assertEqual(StrategyTester.resume(filename), expected)
+            self.assertEqual(load_checkpoint(filename)["done"], [[0, 100]])
+            self.assertEqual(os.listdir(directory), ["run.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import sys
+import unittest
+
+from engine.board_generator import board_generator
+from engine.executors import ProcessExecutor, SerialExecutor, ThreadExecutor
+from engine.strategy_tester import StrategyTester
+from engine.warships import ShipConfig
+from strategies.analytical_strategy import AnalyticalStrategy
+from strategies.human_strategy import HumanStrategy
+
+
+def has_counts(config):
+    return board_generator(config).counts is not None
+
+
+def small_config():
+    config = ShipConfig(width=6, height=6)
+    for length, quantity in ((3, 1), (2, 2), (1, 2)):
+        config.add_ship_details(length, quantity)
+    return config
+
+
+class ThreadExecutorTest(unittest.TestCase):
+    # Chunks on threads share the configs, the board generators and the strategy classes. Threads switch as
+    # often as possible, to give races a chance to show.
+
+    def setUp(self):
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switch_interval)
+
+    def play(self, strategy, executor, config=ShipConfig("polish")):
+        tester = StrategyTester(config=config, chunk_size=5, seed=1, executor=executor)
+        try:
+            return tester.test(strategy, 200)[0]
+        finally:
+            executor.close()
+
+    def test_histogram_is_valid(self):
+        fleet_cells = sum(ship_detail.length * ship_detail.quantity for ship_detail in ShipConfig("polish"))
+        for strategy in (HumanStrategy(), AnalyticalStrategy()):
+            wins = self.play(strategy, ThreadExecutor(4))
+            self.assertEqual(sum(wins), 200)
+            self.assertFalse(any(wins[:fleet_cells]))
+
+    def test_seeded_results_match_serial(self):
+        for strategy in (HumanStrategy(), AnalyticalStrategy()):
+            self.assertEqual(self.play(strategy, ThreadExecutor(4)), self.play(strategy, SerialExecutor()))
+
+    def test_new_board_sizes_match_serial(self):
+        # Sizes no other test builds: one warmed by the executor, one that the chunks build while they run.
+        warmed, cold = ShipConfig("polish", 13, 11), ShipConfig("polish", 11, 13)
+        self.assertEqual(self.play(HumanStrategy(), ThreadExecutor(8, [warmed]), warmed),
+                         self.play(HumanStrategy(), SerialExecutor(), warmed))
+        self.assertEqual(self.play(HumanStrategy(), ThreadExecutor(8), cold),
+                         self.play(HumanStrategy(), SerialExecutor(), cold))
+
+
+class ProcessExecutorTest(unittest.TestCase):
+
+    def test_uniform_board_counts_are_built_for_the_workers(self):
+        config = small_config()
+        with ProcessExecutor(2, [config]) as executor:
+            self.assertFalse(any(executor.imap_unordered(has_counts, [config] * 4)))
+        with ProcessExecutor(2, [config], uniform=True) as executor:
+            self.assertTrue(all(executor.imap_unordered(has_counts, [config] * 4)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+from engine.executors import SerialExecutor
+from engine.opening_book import OpeningBook
+from engine.strategy_tester import StrategyTester
+from engine.warships import ShipConfig
+from strategies.analytical_strategy import AnalyticalStrategy
+
+
+class TinyBookStrategy(AnalyticalStrategy):
+    # A writable book shared by every game, of the first few decisions only and too small to keep them all.
+    book = OpeningBook(ShipConfig("polish"), max_size=8, depth=4)
+
+
+class OpeningBookTest(unittest.TestCase):
+
+    def test_evicting_book_plays_like_no_book(self):
+        tester = StrategyTester(seed=1, chunk_size=10, executor=SerialExecutor())
+        self.assertEqual(tester.test(TinyBookStrategy(), 60), tester.test(AnalyticalStrategy(), 60))
+        self.assertGreater(TinyBookStrategy.book.hits, 0)
+        self.assertGreater(TinyBookStrategy.book.evictions, 0)
+        self.assertEqual(len(TinyBookStrategy.book), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+
+from engine.executors import SerialExecutor
+from engine.strategy_tester import StrategyTester
+from strategies.analytical_strategy import AnalyticalStrategy
+from strategies.human_strategy import HumanStrategy
+
+
+class SeededRunTest(unittest.TestCase):
+    # Every game of a seeded run has seeds of its own, so the chunks and the workers playing them don't matter.
+
+    def test_histogram_does_not_depend_on_chunks_or_workers(self):
+        for strategy in (HumanStrategy(), AnalyticalStrategy()):
+            expected = StrategyTester(seed=1, chunk_size=1, executor=SerialExecutor()).test(strategy, 120)
+            for workers, chunk_size in ((1, None), (2, 7), (3, 50)):
+                with self.subTest(strategy=type(strategy).__name__, workers=workers, chunk_size=chunk_size):
+                    tester = StrategyTester(workers, seed=1, chunk_size=chunk_size)
+                    self.assertEqual(tester.test(strategy, 120), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()